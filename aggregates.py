@@ -0,0 +1,73 @@
+from app import app
+from models import db, Quiz, Score, ChapterScoreSummary, UserChapterScoreSummary
+from sqlalchemy.dialects.sqlite import insert
+import click
+
+
+# Incremental update for a new score, run in the same transaction as the Score insert.
+def record_score(chapter_id, user_id, total_score):
+    _upsert(ChapterScoreSummary, {"chapter_id": chapter_id}, total_score)
+    _upsert(UserChapterScoreSummary, {"user_id": user_id, "chapter_id": chapter_id}, total_score)
+
+
+def _upsert(model, keys, total_score):
+    stmt = insert(model).values(**keys, max_score=total_score, min_score=total_score, total_score=total_score, attempts=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={
+            "max_score": db.func.max(model.max_score, stmt.excluded.max_score),
+            "min_score": db.func.min(model.min_score, stmt.excluded.min_score),
+            "total_score": model.total_score + stmt.excluded.total_score,
+            "attempts": model.attempts + 1,
+        },
+    )
+    db.session.execute(stmt)
+
+
+# Max and min can't be decremented, so removals recompute the affected rows
+# from Score. Pass user_id to limit the per-user rows to one user.
+def refresh_chapter(chapter_id, user_id=None):
+    ChapterScoreSummary.query.filter_by(chapter_id=chapter_id).delete()
+    _insert_from_scores(ChapterScoreSummary, [Quiz.chapter_id], Quiz.chapter_id == chapter_id)
+
+    user_rows = UserChapterScoreSummary.query.filter_by(chapter_id=chapter_id)
+    user_filter = [Quiz.chapter_id == chapter_id]
+    if user_id is not None:
+        user_rows = user_rows.filter_by(user_id=user_id)
+        user_filter.append(Score.user_id == user_id)
+    user_rows.delete()
+    _insert_from_scores(UserChapterScoreSummary, [Score.user_id, Quiz.chapter_id], *user_filter)
+
+
+def rebuild():
+    ChapterScoreSummary.query.delete()
+    UserChapterScoreSummary.query.delete()
+    _insert_from_scores(ChapterScoreSummary, [Quiz.chapter_id])
+    _insert_from_scores(UserChapterScoreSummary, [Score.user_id, Quiz.chapter_id])
+
+
+def _insert_from_scores(model, group_by, *filters):
+    select = (
+        db.select(
+            *group_by,
+            db.func.max(Score.total_score),
+            db.func.min(Score.total_score),
+            db.func.sum(Score.total_score),
+            db.func.count(Score.id),
+        )
+        .join(Quiz, Quiz.id == Score.quiz_id)
+        .filter(*filters)
+        .group_by(*group_by)
+    )
+    columns = [column.key for column in group_by]
+    db.session.execute(
+        insert(model).from_select(columns + ["max_score", "min_score", "total_score", "attempts"], select)
+    )
+
+
+@app.cli.command("rebuild-aggregates")
+def rebuild_aggregates_command():
+    """Rebuild the per-chapter score aggregates from the Score table."""
+    rebuild()
+    db.session.commit()
+    click.echo("Score aggregates rebuilt.")
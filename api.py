@@ -1,11 +1,104 @@
 from app import app
-from models import db, Subject, Chapter, Quiz, Score
-from flask import request, jsonify
+from models import db, User, Subject, Chapter, Quiz, Questions, Score
+from question_cache import question_cache, answer_key
+from routes import attempt_store
+from attempt_sweeper import new_attempt, deadline, is_late
+import aggregates
+import bulk
+from response_cache import cached
+from replica import read_only
+from principal import current_principal
+import question_import
+from flask import request, jsonify, session, abort, make_response, Response, stream_with_context
 from flask_marshmallow import Marshmallow
 from datetime import datetime
+from functools import wraps
+import csv
+import io
+import json
+import time
 
 ma = Marshmallow(app)
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+# Keyset pagination on id: ?limit=N&after=<last id seen>
+def paginate(query, model, schema):
+    limit = int_arg("limit")
+    limit = min(max(limit, 1), MAX_PAGE_SIZE) if limit is not None else DEFAULT_PAGE_SIZE
+    after = int_arg("after")
+
+    if after is not None:
+        query = query.filter(model.id > after)
+
+    items = query.order_by(model.id).limit(limit + 1).all()
+    next_cursor = items[limit - 1].id if len(items) > limit else None
+
+    return jsonify({"items": schema.dump(items[:limit]), "next": next_cursor})
+
+
+# Filters from query args, e.g. ?quiz_id=1&date_from=2025-01-01
+def filter_args(query, columns, date_column=None):
+    for name, column in columns.items():
+        value = int_arg(name)
+        if value is not None:
+            query = query.filter(column == value)
+
+    if date_column is not None:
+        date_from = date_arg("date_from")
+        date_to = date_arg("date_to")
+
+        if date_from:
+            query = query.filter(date_column >= date_from)
+        if date_to:
+            query = query.filter(date_column <= date_to)
+
+    return query
+
+
+# A malformed value is a 400, not a silently dropped filter.
+def int_arg(name):
+    value = request.args.get(name)
+
+    if not value:
+        return None
+
+    try:
+        return int(value)
+    except ValueError:
+        abort(make_response(jsonify({"message": f"{name} must be an integer"}), 400))
+
+
+def date_arg(name):
+    value = request.args.get(name)
+
+    if not value:
+        return None
+
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        abort(make_response(jsonify({"message": "Invalid date format. Use YYYY-MM-DD"}), 400))
+
+
+# JSON counterpart of routes.admin_required.
+def api_admin_required(func):
+    @wraps(func)
+    def inner(*args, **kwargs):
+        principal = current_principal()
+
+        if not principal:
+            return jsonify({"message": "Please log in to continue"}), 401
+
+        if not principal.is_active or not principal.is_admin:
+            return jsonify({"message": "You are not authorized to access this page"}), 403
+        return func(*args, **kwargs)
+
+    return inner
+
+
 class SubjectSchema(ma.Schema):
     class Meta:
         fields = ('id', 'name', 'description')
@@ -28,15 +121,15 @@ def post():
 
 
 @app.route("/api/subject", methods=["GET"])
+@read_only
+@cached("catalogue")
 def get_subjects():
-    all_subjects = Subject.query.all()
-
-    result = subjects_schema.dump(all_subjects)
-
-    return jsonify(result)
+    return paginate(Subject.query, Subject, subjects_schema)
 
 
 @app.route("/api/subject/<int:id>", methods=["GET"])
+@read_only
+@cached("catalogue")
 def get(id):
     subject = Subject.query.get(id)
 
@@ -64,6 +157,7 @@ def delete(id):
 
     db.session.delete(subject)
     db.session.commit()
+    question_cache.clear()
 
     return subject_schema.jsonify(subject)
 
@@ -91,15 +185,17 @@ def chapter_post():
 
 
 @app.route("/api/chapter", methods=["GET"])
+@read_only
+@cached("catalogue")
 def get_chapters():
-    chapters = Chapter.query.all()
-
-    result = chapters_schema.dump(chapters)
+    chapters = filter_args(Chapter.query, {"subject_id": Chapter.subject_id})
 
-    return jsonify(result)
+    return paginate(chapters, Chapter, chapters_schema)
 
 
 @app.route("/api/chapter/<int:id>", methods=["GET"])
+@read_only
+@cached("catalogue")
 def get_chapter(id):
     chapter = Chapter.query.get(id)
 
@@ -121,6 +217,7 @@ def put_chapter(id):
     chapter.subject_id = subject_id
 
     db.session.commit()
+    question_cache.clear()
 
     return chapter_schema.jsonify(chapter)
 
@@ -131,13 +228,14 @@ def chapter_delete(id):
 
     db.session.delete(chapter)
     db.session.commit()
+    question_cache.clear()
 
     return chapter_schema.jsonify(chapter)
 
 
 class QuizSchema(ma.Schema):
     class Meta:
-        fields = ('id', 'chapter_id', 'date_of_quiz', 'duration')
+        fields = ('id', 'chapter_id', 'date_of_quiz', 'duration', 'question_count', 'total_marks', 'questions_per_attempt')
 
 quiz_schema = QuizSchema()
 quizzes_schema = QuizSchema(many=True)
@@ -148,10 +246,14 @@ def quiz_post():
     chapter_id = request.json["chapter_id"]
     date_of_quiz = request.json["date_of_quiz"]
     duration = request.json["duration"]
+    questions_per_attempt, error = bulk.questions_per_attempt_value(request.json.get("questions_per_attempt", 0))
+
+    if error:
+        return jsonify({"message": error}), 400
 
     date_of_quiz = datetime.strptime(date_of_quiz, "%Y-%m-%d").date()
 
-    new_quiz = Quiz(chapter_id=chapter_id, date_of_quiz=date_of_quiz, duration=duration)
+    new_quiz = Quiz(chapter_id=chapter_id, date_of_quiz=date_of_quiz, duration=duration, questions_per_attempt=questions_per_attempt)
 
     db.session.add(new_quiz)
     db.session.commit()
@@ -160,15 +262,17 @@ def quiz_post():
 
 
 @app.route("/api/quiz", methods=["GET"])
+@read_only
+@cached("catalogue")
 def get_quizzes():
-    quizzes = Quiz.query.all()
-
-    result = quizzes_schema.dump(quizzes)
+    quizzes = filter_args(Quiz.query, {"chapter_id": Quiz.chapter_id}, Quiz.date_of_quiz)
 
-    return jsonify(result)
+    return paginate(quizzes, Quiz, quizzes_schema)
 
 
 @app.route("/api/quiz/<int:id>", methods=["GET"])
+@read_only
+@cached("catalogue")
 def get_quiz(id):
     quiz = Quiz.query.get(id)
 
@@ -180,18 +284,30 @@ def get_quiz(id):
 @app.route("/api/quiz/<int:id>", methods=["PUT"])
 def put_quiz(id):
     quiz = Quiz.query.get(id)
+    old_chapter_id = quiz.chapter_id
 
     chapter_id = request.json["chapter_id"]
     date_of_quiz = request.json["date_of_quiz"]
     duration = request.json["duration"]
+    questions_per_attempt, error = bulk.questions_per_attempt_value(request.json.get("questions_per_attempt", quiz.questions_per_attempt))
+
+    if error:
+        return jsonify({"message": error}), 400
 
     date_of_quiz = datetime.strptime(date_of_quiz, "%Y-%m-%d").date()
 
     quiz.chapter_id = chapter_id
     quiz.date_of_quiz = date_of_quiz
     quiz.duration = duration
+    quiz.questions_per_attempt = questions_per_attempt
+
+    if quiz.chapter_id != old_chapter_id:
+        db.session.flush()
+        aggregates.refresh_chapter(old_chapter_id)
+        aggregates.refresh_chapter(quiz.chapter_id)
 
     db.session.commit()
+    question_cache.invalidate(id)
 
     return quiz_schema.jsonify(quiz)
 
@@ -201,11 +317,86 @@ def quiz_delete(id):
     quiz = Quiz.query.get(id)
 
     db.session.delete(quiz)
+    db.session.flush()
+    aggregates.refresh_chapter(quiz.chapter_id)
     db.session.commit()
+    question_cache.invalidate(id)
 
     return quiz_schema.jsonify(quiz)
 
 
+# Bulk question import: a JSON array of questions, or a CSV body (Content-Type: text/csv).
+# Every row is validated before anything is inserted.
+@app.route("/api/quiz/<int:id>/questions", methods=["POST"])
+@api_admin_required
+def quiz_questions_import(id):
+    if not Quiz.query.get(id):
+        return jsonify({"message": "Quiz does not exist!"}), 404
+
+    file_format = "csv" if request.mimetype == "text/csv" else "json"
+
+    try:
+        rows = question_import.parse_questions(request.get_data(as_text=True), file_format)
+    except ValueError as error:
+        return jsonify({"message": str(error)}), 400
+
+    count, errors = question_import.import_questions(id, rows)
+
+    if errors:
+        return jsonify({"imported": 0, "errors": errors}), 400
+
+    question_cache.invalidate(id)
+
+    return jsonify({"imported": count, "errors": []})
+
+
+# Bulk create (POST), update (PUT) and delete (DELETE) in one transaction.
+# POST/PUT take an array of objects (PUT items need "id"), DELETE an array of ids.
+# Nothing is written unless every item is valid; results are reported per item.
+@app.route("/api/<any(subject, chapter, quiz):kind>/bulk", methods=["POST", "PUT", "DELETE"])
+@api_admin_required
+def bulk_items(kind):
+    items = request.json
+
+    if not isinstance(items, list):
+        return jsonify({"message": "Expected a JSON array"}), 400
+
+    old_chapters = {}
+    if kind == "quiz" and request.method != "POST":
+        ids = [item.get("id") if isinstance(item, dict) else item for item in items]
+        old_chapters = dict(db.session.query(Quiz.id, Quiz.chapter_id).filter(Quiz.id.in_([id for id in ids if isinstance(id, int)])))
+
+    if request.method == "POST":
+        ok, results = bulk.bulk_create(kind, items)
+    elif request.method == "PUT":
+        ok, results = bulk.bulk_update(kind, items)
+    else:
+        ok, results = bulk.bulk_delete(kind, items)
+
+    if not ok:
+        db.session.rollback()
+        return jsonify({"results": results}), 400
+
+    if old_chapters:
+        db.session.flush()
+        new_chapters = dict(db.session.query(Quiz.id, Quiz.chapter_id).filter(Quiz.id.in_(old_chapters)))
+        for quiz_id, chapter_id in old_chapters.items():
+            if new_chapters.get(quiz_id) != chapter_id:
+                aggregates.refresh_chapter(chapter_id)
+                if quiz_id in new_chapters:
+                    aggregates.refresh_chapter(new_chapters[quiz_id])
+
+    db.session.commit()
+
+    if kind == "quiz":
+        for quiz_id in old_chapters:
+            question_cache.invalidate(quiz_id)
+    elif request.method != "POST":
+        question_cache.clear()
+
+    return jsonify({"results": results})
+
+
 class ScoreSchema(ma.Schema):
     class Meta:
         fields = ('id', 'quiz_id', 'user_id', 'time_taken', 'total_score', 'date')
@@ -214,16 +405,205 @@ score_schema = ScoreSchema()
 scores_schema = ScoreSchema(many=True)
 
 
-@app.route("/api/score", methods=["GET"])
-def get_scores():
-    scores = Score.query.all()
+# Starts an attempt, or returns the one already running for this quiz in
+# the session, so the quiz page and the API share a single attempt.
+# The deadline is the server's; submissions are timed against it.
+@app.route("/api/quiz/<int:id>/attempt", methods=["POST"])
+def quiz_attempt(id):
+    principal = current_principal()
+
+    if not principal:
+        return jsonify({"message": "Please log in to continue"}), 401
+
+    if not principal.is_active:
+        return jsonify({"message": "Your account is Blocked!"}), 403
+
+    quiz = question_cache.get(id)
+
+    if not quiz:
+        return jsonify({"message": "Quiz does not exist!"}), 404
+
+    attempts = session.get("attempts", {})
+    attempt_id = attempts.get(str(id))
+    attempt = attempt_store.get(attempt_id) if attempt_id else None
+
+    if not attempt or "plan" not in attempt or is_late(attempt, quiz, time.time()):
+        attempt_id, attempt = new_attempt(quiz, principal.user_id)
+        attempt_store.set(attempt_id, attempt)
+        session["attempts"] = {**attempts, str(id): attempt_id}
+
+    questions = (
+        db.session.query(
+            Questions.id, Questions.ques_title, Questions.ques_statement,
+            Questions.option_a, Questions.option_b, Questions.option_c, Questions.option_d,
+        )
+        .filter(Questions.quiz_id == id, Questions.id.in_(attempt["plan"]))
+        .all()
+    )
+    position = {question_id: index for index, question_id in enumerate(attempt["plan"])}
+    questions.sort(key=lambda question: position[question.id])
+
+    return jsonify({
+        "attempt_id": attempt_id,
+        "deadline": deadline(attempt, quiz),
+        "questions": [question._asdict() for question in questions],
+    })
+
+
+# Whole-quiz submission, graded in one pass against the cached answer key.
+# Body: {"attempt_id": "...", "answers": {"<question_id>": "option_a", ...}}
+# The attempt comes from POST /api/quiz/<id>/attempt; time taken is measured
+# by the server from its start, capped at its deadline.
+@app.route("/api/quiz/<int:id>/submit", methods=["POST"])
+def quiz_submit(id):
+    principal = current_principal()
+
+    if not principal:
+        return jsonify({"message": "Please log in to continue"}), 401
+
+    if not principal.is_active:
+        return jsonify({"message": "Your account is Blocked!"}), 403
+
+    quiz = question_cache.get(id)
+
+    if not quiz:
+        return jsonify({"message": "Quiz does not exist!"}), 404
 
-    result = scores_schema.dump(scores)
+    body = request.json
+
+    if not isinstance(body, dict):
+        return jsonify({"message": "Expected a JSON object"}), 400
+
+    answers = body.get("answers") or {}
+
+    if not isinstance(answers, dict):
+        return jsonify({"message": "answers must be an object of question id to option"}), 400
+
+    attempt_id = body.get("attempt_id")
+
+    if not attempt_id:
+        return jsonify({"message": "attempt_id is required; start one with POST /api/quiz/<id>/attempt"}), 400
+
+    attempt = attempt_store.get(attempt_id) if isinstance(attempt_id, str) else None
+
+    if not attempt or attempt["user_id"] != principal.user_id or attempt["quiz_id"] != id:
+        return jsonify({"message": "Quiz attempt does not exist!"}), 404
+
+    now = time.time()
+
+    # Expired attempts are left for the sweeper to record as they stood at the deadline.
+    if is_late(attempt, quiz, now):
+        return jsonify({"message": "Time is up for this attempt"}), 409
+
+    if not attempt_store.pop(attempt_id):
+        return jsonify({"message": "Quiz attempt has already been submitted"}), 409
+
+    attempts = session.get("attempts", {})
+    session["attempts"] = {key: value for key, value in attempts.items() if value != attempt_id}
+
+    time_taken = max(int(min(now, deadline(attempt, quiz)) - attempt["start_time"]), 0)
+    # Only the questions this attempt was given count.
+    key = answer_key(quiz, attempt.get("plan"))
+
+    total_score = 0
+    correct = 0
+    for question_id, (answer, marks) in key.items():
+        if answers.get(str(question_id)) == answer:
+            total_score += marks
+            correct += 1
+
+    score = Score(quiz_id=id, user_id=principal.user_id, time_taken=time_taken, total_score=total_score, date=datetime.today().date())
+
+    db.session.add(score)
+    aggregates.record_score(quiz.chapter_id, principal.user_id, total_score)
+    db.session.commit()
+
+    result = score_schema.dump(score)
+    result["correct"] = correct
+    result["no_of_ques"] = len(key)
 
     return jsonify(result)
 
 
+@app.route("/api/score", methods=["GET"])
+@read_only
+@cached("scores")
+def get_scores():
+    scores = filter_args(Score.query, {"quiz_id": Score.quiz_id, "user_id": Score.user_id}, Score.date)
+
+    return paginate(scores, Score, scores_schema)
+
+
+EXPORT_BATCH_SIZE = 1000
+
+
+# Streams all scores as NDJSON or CSV without building the full result in memory.
+# ?format=ndjson|csv&include=user,quiz,chapter,subject plus the /api/score filters.
+@app.route("/api/score/export", methods=["GET"])
+@read_only
+def export_scores():
+    export_format = request.args.get("format", "ndjson")
+    include = set(filter(None, request.args.get("include", "").split(",")))
+
+    if export_format not in ("ndjson", "csv"):
+        return jsonify({"message": "Format must be ndjson or csv"}), 400
+
+    columns = [Score.id, Score.quiz_id, Score.user_id, Score.time_taken, Score.total_score, Score.date]
+    query = db.session.query(*columns)
+
+    if "user" in include:
+        query = query.add_columns(User.username).join(User, User.id == Score.user_id)
+    if include & {"quiz", "chapter", "subject"}:
+        query = query.join(Quiz, Quiz.id == Score.quiz_id)
+    if "quiz" in include:
+        query = query.add_columns(Quiz.date_of_quiz)
+    if include & {"chapter", "subject"}:
+        query = query.join(Chapter, Chapter.id == Quiz.chapter_id)
+    if "chapter" in include:
+        query = query.add_columns(Chapter.name.label("chapter_name"))
+    if "subject" in include:
+        query = query.add_columns(Subject.name.label("subject_name")).join(Subject, Subject.id == Chapter.subject_id)
+
+    query = filter_args(query, {"quiz_id": Score.quiz_id, "user_id": Score.user_id}, Score.date)
+    query = query.order_by(Score.id).yield_per(EXPORT_BATCH_SIZE)
+    fields = [column["name"] for column in query.column_descriptions]
+
+    def rows():
+        batch = []
+        for row in query:
+            batch.append([value.isoformat() if hasattr(value, "isoformat") else value for value in row])
+            if len(batch) == EXPORT_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def generate_ndjson():
+        for batch in rows():
+            yield "".join(json.dumps(dict(zip(fields, row))) + "\n" for row in batch)
+
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        for batch in rows():
+            writer.writerows(batch)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    if export_format == "csv":
+        response = Response(stream_with_context(generate_csv()), mimetype="text/csv")
+        response.headers["Content-Disposition"] = "attachment; filename=scores.csv"
+        return response
+
+    return Response(stream_with_context(generate_ndjson()), mimetype="application/x-ndjson")
+
+
 @app.route("/api/score/<int:id>", methods=["GET"])
+@read_only
+@cached("scores")
 def get_score(id):
     score = Score.query.get(id)
 
@@ -236,7 +616,11 @@ def get_score(id):
 def score_delete(id):
     score = Score.query.get(id)
 
+    chapter_id = score.quiz.chapter_id
+
     db.session.delete(score)
+    db.session.flush()
+    aggregates.refresh_chapter(chapter_id, score.user_id)
     db.session.commit()
 
     return score_schema.jsonify(score)
\ No newline at end of file
@@ -6,6 +6,8 @@ import config
 import routes
 import models
 import api
+import bootstrap
 
 if __name__ == "__main__":
+    bootstrap.bootstrap()
     app.run(debug=True)
\ No newline at end of file
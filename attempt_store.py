@@ -0,0 +1,149 @@
+from collections import OrderedDict
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+
+
+# Server side storage for in-progress quiz attempts, keyed by attempt id.
+# The session cookie only carries the attempt ids.
+def new_attempt_id():
+    return secrets.token_urlsafe(16)
+
+
+class MemoryAttemptStore:
+    def __init__(self, ttl):
+        self.ttl = ttl
+        # Ordered by last write, so expired attempts are always at the front.
+        self._attempts = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Nothing to create; kept so bootstrap.py can treat both stores alike.
+    def create_tables(self):
+        pass
+
+    def get(self, attempt_id):
+        with self._lock:
+            self._evict()
+            entry = self._attempts.get(attempt_id)
+            return dict(entry[1]) if entry else None
+
+    def set(self, attempt_id, state):
+        with self._lock:
+            self._attempts[attempt_id] = (time.time() + self.ttl, dict(state))
+            self._attempts.move_to_end(attempt_id)
+            self._evict()
+
+    def delete(self, attempt_id):
+        with self._lock:
+            self._attempts.pop(attempt_id, None)
+
+    # Removes and returns the attempt; only one caller can finish an attempt.
+    def pop(self, attempt_id):
+        with self._lock:
+            entry = self._attempts.pop(attempt_id, None)
+            return entry[1] if entry else None
+
+    # Ids of attempts whose deadline is at or before the given time.
+    def due(self, before, limit):
+        with self._lock:
+            ids = [
+                attempt_id for attempt_id, (expires_at, state) in self._attempts.items()
+                if state.get("deadline") is not None and state["deadline"] <= before
+            ]
+            return ids[:limit]
+
+    def _evict(self):
+        now = time.time()
+        while self._attempts:
+            attempt_id, (expires_at, state) = next(iter(self._attempts.items()))
+            if expires_at > now:
+                break
+            self._attempts.popitem(last=False)
+
+
+class SQLiteAttemptStore:
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+
+    # Run once by bootstrap.py, along with the main schema.
+    def create_tables(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS attempt (id TEXT PRIMARY KEY, state TEXT NOT NULL, expires_at REAL NOT NULL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_attempt_expires_at ON attempt (expires_at)")
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(attempt)")}
+        if "deadline" not in columns:
+            conn.execute("ALTER TABLE attempt ADD COLUMN deadline REAL")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_attempt_deadline ON attempt (deadline)")
+        conn.commit()
+        self.evict()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            self._local.conn = conn
+        return conn
+
+    def get(self, attempt_id):
+        row = self._connect().execute(
+            "SELECT state FROM attempt WHERE id = ? AND expires_at > ?", (attempt_id, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, attempt_id, state):
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO attempt (id, state, expires_at, deadline) VALUES (?, ?, ?, ?)",
+            (attempt_id, json.dumps(state), time.time() + self.ttl, state.get("deadline")),
+        )
+        conn.commit()
+
+        # Sweep expired rows every so often instead of on every write.
+        self._writes += 1
+        if self._writes % 256 == 0:
+            self.evict()
+
+    def delete(self, attempt_id):
+        conn = self._connect()
+        conn.execute("DELETE FROM attempt WHERE id = ?", (attempt_id,))
+        conn.commit()
+
+    def pop(self, attempt_id):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT state FROM attempt WHERE id = ?", (attempt_id,)).fetchone()
+            conn.execute("DELETE FROM attempt WHERE id = ?", (attempt_id,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return json.loads(row[0]) if row else None
+
+    def due(self, before, limit):
+        rows = self._connect().execute(
+            "SELECT id FROM attempt WHERE deadline <= ? ORDER BY deadline LIMIT ?", (before, limit)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def evict(self):
+        conn = self._connect()
+        conn.execute("DELETE FROM attempt WHERE expires_at <= ?", (time.time(),))
+        conn.commit()
+
+
+def make_attempt_store(config):
+    ttl = config["ATTEMPT_TTL"]
+
+    if config["ATTEMPT_STORE"] == "sqlite":
+        return SQLiteAttemptStore(config["ATTEMPT_STORE_PATH"], ttl)
+
+    return MemoryAttemptStore(ttl)
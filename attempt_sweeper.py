@@ -0,0 +1,108 @@
+from app import app
+from question_cache import question_cache, plan_questions
+from attempt_store import new_attempt_id
+from score_queue import score_writer
+from background import BackgroundThread
+from datetime import date
+import click
+import time
+
+
+# The server's clock decides when an attempt ends, never the posted
+# remaining_time. The grace period lets the page's own auto-submit, sent
+# as the timer reaches zero, still count.
+def deadline(attempt, quiz):
+    return attempt.get("deadline") or attempt["start_time"] + quiz.duration * 60
+
+
+# A new attempt for the quiz page and the API, with its start time,
+# deadline and question plan all set by the server. Returns (id, attempt).
+def new_attempt(quiz, user_id):
+    attempt_id = new_attempt_id()
+    start_time = int(time.time())
+
+    return attempt_id, {
+        "user_id": user_id,
+        "quiz_id": quiz.id,
+        "progress": 0,
+        "score": 0,
+        "start_time": start_time,
+        "deadline": start_time + quiz.duration * 60,
+        "plan": plan_questions(quiz, attempt_id),
+    }
+
+
+def is_late(attempt, quiz, now):
+    return now > deadline(attempt, quiz) + app.config["ATTEMPT_GRACE_SECONDS"]
+
+
+# (quiz_id, chapter_id, user_id, time_taken, total_score, date) for a finished
+# attempt, timed from its start to when it was submitted, capped at the deadline.
+def score_row(attempt, quiz, now):
+    finished_at = min(attempt.get("finished_at") or now, deadline(attempt, quiz))
+    time_taken = max(int(finished_at - attempt["start_time"]), 0)
+    return (quiz.id, quiz.chapter_id, attempt["user_id"], time_taken, attempt["score"], date.today())
+
+
+# Finalises attempts that ran out of time without being submitted, so every
+# attempt ends up as a Score row. Each attempt is popped from the store
+# before it is scored; whichever of result() and the sweeper pops it first
+# records it.
+class AttemptSweeper:
+    def __init__(self, store, interval, batch_size):
+        self.store = store
+        self.interval = interval
+        self.batch_size = batch_size
+        self._thread = BackgroundThread("attempt-sweeper", self._run)
+
+    def sweep(self):
+        finalised = 0
+
+        while True:
+            cutoff = time.time() - app.config["ATTEMPT_GRACE_SECONDS"]
+            attempt_ids = self.store.due(cutoff, self.batch_size)
+
+            rows = []
+            for attempt_id in attempt_ids:
+                attempt = self.store.pop(attempt_id)
+                quiz = question_cache.get(attempt["quiz_id"]) if attempt else None
+                # Submitted in the meantime, or the quiz was deleted.
+                if quiz:
+                    rows.append(score_row(attempt, quiz, time.time()))
+
+            if rows:
+                score_writer.add_many(rows)
+            finalised += len(rows)
+
+            if len(attempt_ids) < self.batch_size:
+                return finalised
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                with app.app_context():
+                    self.sweep()
+            except Exception:
+                app.logger.exception("Sweeping expired attempts failed; retrying on the next tick")
+
+
+def make_attempt_sweeper(store, config):
+    sweeper = AttemptSweeper(store, config["ATTEMPT_SWEEP_INTERVAL"], config["ATTEMPT_SWEEP_BATCH"])
+
+    if sweeper.interval:
+        app.before_request(sweeper.start)
+
+    return sweeper
+
+
+# Each worker sweeps its own attempts. From the CLI this only reaches
+# attempts in a shared store (ATTEMPT_STORE=sqlite).
+@app.cli.command("sweep-attempts")
+def sweep_attempts_command():
+    """Finalise attempts past their deadline into Score rows."""
+    from routes import attempt_sweeper
+    click.echo(f"Finalised {attempt_sweeper.sweep()} expired attempts.")
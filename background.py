@@ -0,0 +1,31 @@
+import os
+import threading
+
+
+# A daemon thread that runs target, started lazily so a worker forked from
+# a preloaded app gets its own thread. setup runs before each (re)start.
+class BackgroundThread:
+    def __init__(self, name, target, setup=None):
+        self.name = name
+        self.target = target
+        self.setup = setup
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            if self.setup:
+                self.setup()
+            self._thread = threading.Thread(target=self.target, name=self.name, daemon=True)
+            self._thread.start()
+
+    # Whether this process started the thread (forked children inherit the object, not the thread).
+    def started(self):
+        return self._thread is not None and self._pid == os.getpid()
+
+    def join(self):
+        self._thread.join()
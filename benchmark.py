@@ -0,0 +1,408 @@
+"""Load test for the quiz app.
+
+Seeds a throwaway SQLite database through the models, then drives the quiz
+flow, the summary pages and the REST API with Flask's test client, or over
+HTTP against a local threaded server with --concurrency.
+
+    python benchmark.py --students 50 --save baseline.json
+    python benchmark.py --students 50 --compare baseline.json
+    python benchmark.py --writers 16    # exits non-zero on lock errors
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from http.cookiejar import CookieJar
+from urllib.parse import urlencode
+from urllib.request import build_opener, HTTPCookieProcessor, Request
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the quiz app against a seeded SQLite database.")
+    parser.add_argument("--subjects", type=int, default=5)
+    parser.add_argument("--chapters", type=int, default=5, help="chapters per subject")
+    parser.add_argument("--quizzes", type=int, default=4, help="quizzes per chapter")
+    parser.add_argument("--questions", type=int, default=10, help="questions per quiz")
+    parser.add_argument("--per-attempt", type=int, default=0, help="questions sampled per attempt (0 = all)")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--scores", type=int, default=20000, help="existing Score rows")
+    parser.add_argument("--students", type=int, default=20, help="students taking a quiz during the run")
+    parser.add_argument("--concurrency", type=int, default=0, help="run over HTTP with this many client threads")
+    parser.add_argument("--writers", type=int, default=0, help="also run this many threads committing scores at once")
+    parser.add_argument("--writes", type=int, default=100, help="scores committed by each writer thread")
+    parser.add_argument("--startup", type=int, default=0, help="also time this many cold starts of a fresh worker process")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare against results saved with --save")
+    return parser.parse_args()
+
+
+# The app reads its config from the environment at import time.
+def load_app(database):
+    os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{database}"
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("ADMIN_PASSWORD", "admin")
+    # Turns on the query counter behind the X-Query-Count header.
+    os.environ.setdefault("TESTING", "true")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    import app as app_module
+    import bootstrap
+    bootstrap.bootstrap()
+    return app_module.app
+
+
+def seed(app, args, rng):
+    from models import db, User, Subject, Chapter, Quiz, Questions, Score, backfill_quiz_totals
+    from werkzeug.security import generate_password_hash
+    import aggregates
+
+    with app.app_context():
+        pass_hash = generate_password_hash("password")
+        db.session.execute(db.insert(User), [
+            {"username": f"student{i}", "password_hash": pass_hash, "name": f"Student {i}", "qualification": "BACHELORS", "dob": date(2000, 1, 1)}
+            for i in range(args.users)
+        ])
+        db.session.execute(db.insert(Subject), [{"name": f"Subject {i}", "description": "Benchmark"} for i in range(args.subjects)])
+        subject_ids = db.session.scalars(db.select(Subject.id)).all()
+
+        db.session.execute(db.insert(Chapter), [
+            {"name": f"Chapter {s}.{c}", "description": "Benchmark", "subject_id": subject_id}
+            for s, subject_id in enumerate(subject_ids) for c in range(args.chapters)
+        ])
+        chapter_ids = db.session.scalars(db.select(Chapter.id)).all()
+
+        today = date.today()
+        db.session.execute(db.insert(Quiz), [
+            {"chapter_id": chapter_id, "date_of_quiz": today + timedelta(days=rng.randint(-30, 30)), "duration": 30, "questions_per_attempt": args.per_attempt}
+            for chapter_id in chapter_ids for q in range(args.quizzes)
+        ])
+        quiz_ids = db.session.scalars(db.select(Quiz.id)).all()
+
+        db.session.execute(db.insert(Questions), [
+            {
+                "quiz_id": quiz_id, "ques_title": f"Question {n}", "ques_statement": f"Benchmark question {n} of quiz {quiz_id}",
+                "option_a": "A", "option_b": "B", "option_c": "C", "option_d": "D",
+                "answer": rng.choice(["option_a", "option_b", "option_c", "option_d"]), "marks": rng.randint(1, 5),
+            }
+            for quiz_id in quiz_ids for n in range(args.questions)
+        ])
+
+        user_ids = db.session.scalars(db.select(User.id).where(User.is_admin == False)).all()
+        db.session.execute(db.insert(Score), [
+            {
+                "quiz_id": rng.choice(quiz_ids), "user_id": rng.choice(user_ids), "time_taken": rng.randint(60, 1800),
+                "total_score": rng.randint(0, args.questions * 5), "date": today - timedelta(days=rng.randint(0, 60)),
+            }
+            for i in range(args.scores)
+        ])
+        db.session.commit()
+
+        backfill_quiz_totals()
+        aggregates.rebuild()
+        db.session.commit()
+
+        return quiz_ids
+
+
+# Timings per step: {step: [(seconds, queries), ...]}
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def add(self, step, seconds, queries):
+        with self._lock:
+            self.samples[step].append((seconds, queries))
+
+
+# Test client driver.
+class ClientDriver:
+    def __init__(self, app, recorder):
+        self.client = app.test_client()
+        self.recorder = recorder
+
+    def request(self, step, method, path, data=None, json_body=None):
+        start = time.perf_counter()
+        response = self.client.open(path, method=method, data=data, json=json_body)
+        elapsed = time.perf_counter() - start
+        self.recorder.add(step, elapsed, int(response.headers.get("X-Query-Count", 0)))
+        return response.status_code, response.headers.get("Location"), response.get_data()
+
+
+# HTTP driver with its own cookie jar, for --concurrency.
+class HTTPDriver:
+    def __init__(self, base_url, recorder):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.opener = build_opener(HTTPCookieProcessor(CookieJar()), NoRedirect())
+
+    def request(self, step, method, path, data=None, json_body=None):
+        body = None
+        headers = {}
+        if data is not None:
+            body = urlencode(data).encode()
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers["Content-Type"] = "application/json"
+
+        start = time.perf_counter()
+        response = self.opener.open(Request(self.base_url + path, data=body, headers=headers, method=method))
+        payload = response.read()
+        elapsed = time.perf_counter() - start
+        self.recorder.add(step, elapsed, int(response.headers.get("X-Query-Count", 0)))
+        return response.status, response.headers.get("Location"), payload
+
+
+def NoRedirect():
+    from urllib.request import HTTPRedirectHandler
+
+    class Handler(HTTPRedirectHandler):
+        def redirect_request(self, *args, **kwargs):
+            return None
+
+        def http_error_302(self, req, fp, code, msg, headers):
+            return fp
+
+    return Handler()
+
+
+def take_quiz(driver, username, quiz_id, rng):
+    driver.request("login", "POST", "/login", data={"username": username, "password": "password"})
+    status, location, body = driver.request("quiz_start", "GET", f"/quiz-start/{quiz_id}")
+
+    while True:
+        answer = rng.choice(["option_a", "option_b", "option_c", "option_d"])
+        status, location, body = driver.request("quiz_start_post", "POST", f"/quiz-start/{quiz_id}", data={"answer": answer, "save": ""})
+        status, location, body = driver.request("quiz_start", "GET", f"/quiz-start/{quiz_id}")
+        if location and "/result/" in location:
+            break
+
+    driver.request("result", "GET", location[location.index("/result/"):])
+
+    for path, step in (("/scores", "scores"), ("/summary", "summary_user"), ("/upcoming-quiz", "upcoming_quiz")):
+        driver.request(step, "GET", path)
+
+
+def browse_admin(driver):
+    driver.request("login", "POST", "/login", data={"username": "admin", "password": os.environ["ADMIN_PASSWORD"]})
+    for path, step in (("/admin", "admin"), ("/admin/quiz", "quiz"), ("/admin/summary", "admin_summary")):
+        driver.request(step, "GET", path)
+
+
+def browse_api(driver):
+    for path, step in (
+        ("/api/subject", "api_subjects"), ("/api/chapter", "api_chapters"),
+        ("/api/quiz", "api_quizzes"), ("/api/score?limit=100", "api_scores"),
+    ):
+        driver.request(step, "GET", path)
+
+
+def run(app, args, quiz_ids, rng):
+    recorder = Recorder()
+    students = [(f"student{i % args.users}", rng.choice(quiz_ids), random.Random(args.seed + i)) for i in range(args.students)]
+
+    if args.concurrency:
+        from werkzeug.serving import make_server
+
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+        make_driver = lambda: HTTPDriver(base_url, recorder)
+    else:
+        server = None
+        make_driver = lambda: ClientDriver(app, recorder)
+
+    start = time.perf_counter()
+
+    browse_admin(make_driver())
+    browse_api(make_driver())
+
+    if args.concurrency:
+        queue = list(students)
+        lock = threading.Lock()
+
+        def worker():
+            while True:
+                with lock:
+                    if not queue:
+                        return
+                    username, quiz_id, student_rng = queue.pop()
+                take_quiz(make_driver(), username, quiz_id, student_rng)
+
+        threads = [threading.Thread(target=worker) for i in range(args.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    else:
+        for username, quiz_id, student_rng in students:
+            take_quiz(make_driver(), username, quiz_id, student_rng)
+
+    elapsed = time.perf_counter() - start
+
+    if server:
+        server.shutdown()
+
+    return report(recorder, elapsed)
+
+
+# N threads each committing scores the way result() does. Any
+# "database is locked" error is counted rather than raised.
+def check_writers(app, args, quiz_ids):
+    from models import db, User, Quiz, Score
+    from sqlalchemy.exc import OperationalError
+    import aggregates
+
+    with app.app_context():
+        user_ids = db.session.scalars(db.select(User.id).where(User.is_admin == False)).all()
+
+    errors = []
+
+    def writer(n):
+        rng = random.Random(args.seed + n)
+        with app.app_context():
+            for i in range(args.writes):
+                try:
+                    quiz = db.session.get(Quiz, rng.choice(quiz_ids))
+                    user_id = rng.choice(user_ids)
+                    total_score = rng.randint(0, quiz.total_marks)
+                    db.session.add(Score(quiz_id=quiz.id, user_id=user_id, time_taken=rng.randint(60, 1800), total_score=total_score, date=date.today()))
+                    aggregates.record_score(quiz.chapter_id, user_id, total_score)
+                    db.session.commit()
+                except OperationalError as e:
+                    db.session.rollback()
+                    errors.append(str(e.orig))
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(args.writers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    commits = args.writers * args.writes - len(errors)
+    return {
+        "threads": args.writers, "commits": commits, "errors": len(errors),
+        "commits_per_s": round(commits / elapsed, 1), "first_error": errors[0] if errors else None,
+    }
+
+
+# Cold start of a worker against the already-seeded database: import the
+# app and serve one request, in a fresh interpreter each run.
+def measure_startup(runs):
+    code = (
+        "import time; start = time.perf_counter(); import app; "
+        "app.app.test_client().get('/login'); print(time.perf_counter() - start)"
+    )
+    times = []
+    for i in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        )
+        times.append(float(output.stdout.split()[-1]) * 1000)
+
+    from metrics import percentile
+    return {"runs": runs, "p50_ms": round(percentile(times, 50), 1), "min_ms": round(min(times), 1), "max_ms": round(max(times), 1)}
+
+
+def report(recorder, elapsed):
+    from metrics import percentile
+
+    steps = {}
+    for step, samples in sorted(recorder.samples.items()):
+        times = [seconds * 1000 for seconds, queries in samples]
+        steps[step] = {
+            "requests": len(samples),
+            "p50_ms": round(percentile(times, 50), 2),
+            "p95_ms": round(percentile(times, 95), 2),
+            "p99_ms": round(percentile(times, 99), 2),
+            "queries_per_request": round(sum(queries for seconds, queries in samples) / len(samples), 2),
+        }
+
+    total = sum(step["requests"] for step in steps.values())
+    return {"elapsed_s": round(elapsed, 2), "requests": total, "throughput_rps": round(total / elapsed, 1), "steps": steps}
+
+
+def print_results(results, baseline=None):
+    print(f"{results['requests']} requests in {results['elapsed_s']} s, {results['throughput_rps']} req/s")
+    if baseline:
+        print(f"baseline: {baseline['throughput_rps']} req/s ({change(baseline['throughput_rps'], results['throughput_rps'])})")
+
+    print(f"\n{'step':<18}{'requests':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}")
+    for step, stats in results["steps"].items():
+        line = f"{step:<18}{stats['requests']:>9}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['queries_per_request']:>9}"
+        old = baseline["steps"].get(step) if baseline else None
+        if old:
+            line += f"   p95 {change(old['p95_ms'], stats['p95_ms'])}, queries {old['queries_per_request']} -> {stats['queries_per_request']}"
+        print(line)
+
+    startup = results.get("startup")
+    if startup:
+        line = f"\ncold start ({startup['runs']} runs): p50 {startup['p50_ms']} ms, min {startup['min_ms']} ms, max {startup['max_ms']} ms"
+        if baseline and baseline.get("startup"):
+            line += f"   p50 {change(baseline['startup']['p50_ms'], startup['p50_ms'])}"
+        print(line)
+
+    writers = results.get("writers")
+    if writers:
+        print(f"\n{writers['threads']} writer threads: {writers['commits']} commits, {writers['commits_per_s']} commits/s, {writers['errors']} errors")
+        if writers["first_error"]:
+            print(f"first error: {writers['first_error']}")
+
+
+def change(old, new):
+    if not old:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = load_app(os.path.join(directory, "benchmark.sqlite3"))
+        app.logger.disabled = True
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+        seed_start = time.perf_counter()
+        quiz_ids = seed(app, args, rng)
+        print(f"Seeded in {time.perf_counter() - seed_start:.1f} s")
+
+        results = run(app, args, quiz_ids, rng)
+        if args.startup:
+            results["startup"] = measure_startup(args.startup)
+        if args.writers:
+            results["writers"] = check_writers(app, args, quiz_ids)
+        results["config"] = {key: value for key, value in vars(args).items() if key not in ("save", "compare")}
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+
+    print_results(results, baseline)
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"\nSaved results to {args.save}")
+
+    if results.get("writers", {}).get("errors"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+from app import app
+from models import db, init_db
+from search_index import create_search_index
+from principal import principal_versions
+from routes import attempt_store
+from score_queue import score_writer
+import click
+
+
+# One-time setup that used to run on every import: schema, migrations,
+# search index, the admin account and the side stores' tables. Idempotent,
+# so safe to re-run after pulling new models.
+def bootstrap():
+    with app.app_context():
+        init_db()
+        create_search_index()
+    principal_versions.create_table()
+    attempt_store.create_tables()
+    score_writer.create_tables()
+
+
+@app.cli.command("init-db")
+def init_db_command():
+    """Create or migrate the database schema and the admin account."""
+    bootstrap()
+    click.echo("Database initialised.")
+
+
+# Workers never create the schema, so a database that `flask init-db` hasn't
+# been run against fails its first request with a clear message instead of
+# "no such table" errors on every page.
+_schema_checked = False
+
+
+def _check_schema():
+    global _schema_checked
+
+    if _schema_checked:
+        return
+
+    missing = set(db.metadata.tables) - set(db.inspect(db.engine).get_table_names())
+    if missing:
+        raise RuntimeError(f"Database tables {', '.join(sorted(missing))} are missing; run `flask init-db` first.")
+
+    _schema_checked = True
+
+
+# Ahead of the other hooks, so the background writers don't start first.
+app.before_request_funcs.setdefault(None, []).insert(0, _check_schema)
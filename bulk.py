@@ -0,0 +1,154 @@
+from models import db, Subject, Chapter, Quiz
+from datetime import datetime
+
+
+# Field validators for the bulk API, each returns (row, errors) for one item.
+def subject_row(item):
+    errors = [f"{field} is required" for field in ("name", "description") if not item.get(field)]
+    return {"name": item.get("name"), "description": item.get("description")}, errors
+
+
+def chapter_row(item):
+    errors = [f"{field} is required" for field in ("name", "description", "subject_id") if not item.get(field)]
+    return {"name": item.get("name"), "description": item.get("description"), "subject_id": item.get("subject_id")}, errors
+
+
+def quiz_row(item):
+    errors = [f"{field} is required" for field in ("chapter_id", "date_of_quiz", "duration") if not item.get(field)]
+    row = {"chapter_id": item.get("chapter_id"), "date_of_quiz": item.get("date_of_quiz"), "duration": item.get("duration")}
+
+    if row["date_of_quiz"]:
+        try:
+            row["date_of_quiz"] = datetime.strptime(row["date_of_quiz"], "%Y-%m-%d").date()
+        except (TypeError, ValueError):
+            errors.append("date_of_quiz must be YYYY-MM-DD")
+
+    if row["duration"]:
+        try:
+            row["duration"] = int(row["duration"])
+        except (TypeError, ValueError):
+            errors.append("duration must be a number")
+
+    # Optional: left out, a new quiz gets the column default and an update keeps the current value.
+    if "questions_per_attempt" in item:
+        row["questions_per_attempt"], error = questions_per_attempt_value(item["questions_per_attempt"])
+        if error:
+            errors.append(error)
+
+    return row, errors
+
+
+# Also used by the single-quiz API endpoints; returns (value, error).
+def questions_per_attempt_value(value):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None, "questions_per_attempt must be a number"
+
+    if value < 0:
+        return None, "questions_per_attempt can't be negative"
+
+    return value, None
+
+
+# Model, row validator and the foreign keys that must point at existing rows.
+BULK_MODELS = {
+    "subject": (Subject, subject_row, {}),
+    "chapter": (Chapter, chapter_row, {"subject_id": Subject}),
+    "quiz": (Quiz, quiz_row, {"chapter_id": Chapter}),
+}
+
+
+def existing_ids(model, ids):
+    ids = {id for id in ids if isinstance(id, int)}
+    if not ids:
+        return set()
+    return set(db.session.scalars(db.select(model.id).where(model.id.in_(ids))))
+
+
+# Validate every item up front; returns (rows, errors) where errors is keyed by item index.
+def validate_items(kind, items, with_id=False):
+    model, validate, references = BULK_MODELS[kind]
+    rows = []
+    errors = {}
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors[index] = ["Item must be an object"]
+            rows.append(None)
+            continue
+
+        row, item_errors = validate(item)
+        if with_id:
+            row["id"] = item.get("id")
+            if row["id"] is None:
+                item_errors.append("id is required")
+        rows.append(row)
+
+        if item_errors:
+            errors[index] = item_errors
+
+    checks = dict(references)
+    if with_id:
+        checks["id"] = model
+
+    for field, target in checks.items():
+        found = existing_ids(target, [row[field] for row in rows if row])
+        for index, row in enumerate(rows):
+            if row and row[field] is not None and row[field] not in found:
+                errors.setdefault(index, []).append(f"{field} {row[field]} does not exist")
+
+    return rows, errors
+
+
+def error_results(items, errors):
+    return [
+        {"index": index, "status": "error" if index in errors else "skipped", "errors": errors.get(index, [])}
+        for index in range(len(items))
+    ]
+
+
+def bulk_create(kind, items):
+    model = BULK_MODELS[kind][0]
+    rows, errors = validate_items(kind, items)
+
+    if errors:
+        return False, error_results(items, errors)
+
+    # One multi-row INSERT per set of fields sent, with the RETURNING ids in the same order as the items.
+    ids = db.session.scalars(db.insert(model).returning(model.id, sort_by_parameter_order=True), rows).all()
+
+    return True, [{"index": index, "status": "created", "id": id} for index, id in enumerate(ids)]
+
+
+def bulk_update(kind, items):
+    model = BULK_MODELS[kind][0]
+    rows, errors = validate_items(kind, items, with_id=True)
+
+    if errors:
+        return False, error_results(items, errors)
+
+    db.session.execute(db.update(model), rows)
+
+    return True, [{"index": index, "status": "updated", "id": row["id"]} for index, row in enumerate(rows)]
+
+
+# Deletes go through the ORM so the relationship cascades still apply.
+def bulk_delete(kind, ids):
+    model = BULK_MODELS[kind][0]
+    errors = {index: ["Item must be an integer id"] for index, id in enumerate(ids) if not isinstance(id, int)}
+
+    objects = model.query.filter(model.id.in_([id for id in ids if isinstance(id, int)])).all()
+    found = {obj.id for obj in objects}
+
+    for index, id in enumerate(ids):
+        if index not in errors and id not in found:
+            errors[index] = [f"id {id} does not exist"]
+
+    if errors:
+        return False, error_results(ids, errors)
+
+    for obj in objects:
+        db.session.delete(obj)
+
+    return True, [{"index": index, "status": "deleted", "id": id} for index, id in enumerate(ids)]
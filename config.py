@@ -5,4 +5,51 @@ load_dotenv()
 
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('SQLALCHEMY_DATABASE_URI')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = os.getenv('SQLALCHEMY_TRACK_MODIFICATIONS')
\ No newline at end of file
+app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = os.getenv('SQLALCHEMY_TRACK_MODIFICATIONS')
+app.config['TESTING'] = os.getenv('TESTING', 'false').lower() == 'true'
+app.config['MAX_QUERIES_PER_PAGE'] = int(os.getenv('MAX_QUERIES_PER_PAGE', 10))
+app.config['QUESTION_CACHE_TTL'] = int(os.getenv('QUESTION_CACHE_TTL', 60))
+app.config['ATTEMPT_STORE'] = os.getenv('ATTEMPT_STORE', 'memory')
+app.config['ATTEMPT_STORE_PATH'] = os.getenv('ATTEMPT_STORE_PATH', os.path.join(app.instance_path, 'attempts.sqlite3'))
+app.config['ATTEMPT_TTL'] = int(os.getenv('ATTEMPT_TTL', 86400))
+app.config['ATTEMPT_GRACE_SECONDS'] = int(os.getenv('ATTEMPT_GRACE_SECONDS', 10))
+app.config['ATTEMPT_SWEEP_INTERVAL'] = int(os.getenv('ATTEMPT_SWEEP_INTERVAL', 60))
+app.config['ATTEMPT_SWEEP_BATCH'] = int(os.getenv('ATTEMPT_SWEEP_BATCH', 500))
+app.config['PRINCIPAL_TTL'] = int(os.getenv('PRINCIPAL_TTL', 10))
+app.config['PRINCIPAL_CACHE_SIZE'] = int(os.getenv('PRINCIPAL_CACHE_SIZE', 1024))
+app.config['PRINCIPAL_VERSION_PATH'] = os.getenv('PRINCIPAL_VERSION_PATH', os.path.join(app.instance_path, 'principals.sqlite3'))
+app.config['TIMELINE_TTL'] = int(os.getenv('TIMELINE_TTL', 60))
+app.config['RESPONSE_CACHE_TTL'] = int(os.getenv('RESPONSE_CACHE_TTL', 30))
+app.config['RESPONSE_CACHE_SIZE'] = int(os.getenv('RESPONSE_CACHE_SIZE', 1024))
+app.config['INSTRUMENTATION'] = os.getenv('INSTRUMENTATION', 'false').lower() == 'true'
+app.config['SLOW_REQUEST_MS'] = int(os.getenv('SLOW_REQUEST_MS', 500))
+app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN')
+app.config['SCORE_WRITER'] = os.getenv('SCORE_WRITER', 'sync')
+app.config['SCORE_QUEUE_PATH'] = os.getenv('SCORE_QUEUE_PATH', os.path.join(app.instance_path, 'scores.journal.sqlite3'))
+app.config['SCORE_BATCH_SIZE'] = int(os.getenv('SCORE_BATCH_SIZE', 100))
+app.config['SCORE_FLUSH_MS'] = int(os.getenv('SCORE_FLUSH_MS', 500))
+app.config['SCORE_MAX_ATTEMPTS'] = int(os.getenv('SCORE_MAX_ATTEMPTS', 5))
+app.config['READ_REPLICA'] = os.getenv('READ_REPLICA', 'true').lower() == 'true'
+app.config['SQLALCHEMY_REPLICA_URI'] = os.getenv('SQLALCHEMY_REPLICA_URI')
+app.config['FRAGMENT_CACHE_TTL'] = int(os.getenv('FRAGMENT_CACHE_TTL', 300))
+app.config['FRAGMENT_CACHE_SIZE'] = int(os.getenv('FRAGMENT_CACHE_SIZE', 256))
+app.config['JINJA_BYTECODE_CACHE_DIR'] = os.getenv('JINJA_BYTECODE_CACHE_DIR', os.path.join(app.instance_path, 'jinja_cache'))
+app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', 10))
+app.config['DB_MAX_OVERFLOW'] = int(os.getenv('DB_MAX_OVERFLOW', 20))
+app.config['DB_POOL_RECYCLE'] = int(os.getenv('DB_POOL_RECYCLE', 3600))
+app.config['DB_POOL_PRE_PING'] = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+app.config['SQLITE_JOURNAL_MODE'] = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+app.config['SQLITE_SYNCHRONOUS'] = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+app.config['SQLITE_BUSY_TIMEOUT'] = int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000))
+app.config['SQLITE_MMAP_SIZE'] = int(os.getenv('SQLITE_MMAP_SIZE', 268435456))
+app.config['SQLITE_CACHE_SIZE'] = int(os.getenv('SQLITE_CACHE_SIZE', -64000))
+
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_pre_ping': app.config['DB_POOL_PRE_PING'],
+    'pool_recycle': app.config['DB_POOL_RECYCLE'],
+}
+
+# In-memory SQLite uses a single shared connection, so there is no pool to size.
+if ':memory:' not in (app.config['SQLALCHEMY_DATABASE_URI'] or ''):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS']['pool_size'] = app.config['DB_POOL_SIZE']
+    app.config['SQLALCHEMY_ENGINE_OPTIONS']['max_overflow'] = app.config['DB_MAX_OVERFLOW']
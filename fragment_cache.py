@@ -0,0 +1,118 @@
+from app import app
+from jinja2 import nodes, FileSystemBytecodeCache
+from jinja2.ext import Extension
+from markupsafe import Markup
+from collections import OrderedDict
+from datetime import date
+import os
+import threading
+import time
+import versions
+
+
+# Fragments hold subjects, chapters, quizzes and questions only, so they are
+# dropped whenever a write to those commits. Today's date is part of the
+# key because the quiz timeline splits on it.
+SCOPES = ("catalogue", "questions")
+
+
+class FragmentCache:
+    def __init__(self, ttl, maxsize):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._fragments = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._fragments.get(key)
+            if not entry:
+                return None
+            expires_at, html = entry
+            if expires_at <= time.time():
+                del self._fragments[key]
+                return None
+            self._fragments.move_to_end(key)
+            return html
+
+    # ttl can only shorten the cache's own.
+    def set(self, key, html, ttl=None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._fragments[key] = (time.time() + ttl, html)
+            self._fragments.move_to_end(key)
+            while len(self._fragments) > self.maxsize:
+                self._fragments.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+
+
+fragment_cache = FragmentCache(app.config["FRAGMENT_CACHE_TTL"], app.config["FRAGMENT_CACHE_SIZE"])
+
+
+# {% cache "name", arg, ..., ttl=seconds %} ... {% endcache %}
+# The body is rendered once per name, args, catalogue version and day.
+# ttl is optional, for fragments built from data cached for less time.
+class FragmentCacheExtension(Extension):
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        ttl = nodes.Const(None)
+        while parser.stream.skip_if("comma"):
+            if parser.stream.current.test("name:ttl") and parser.stream.look().test("assign"):
+                next(parser.stream)
+                next(parser.stream)
+                ttl = parser.parse_expression()
+            else:
+                args.append(parser.parse_expression())
+
+        body = parser.parse_statements(["name:endcache"], drop_needle=True)
+        return nodes.CallBlock(self.call_method("_render", [nodes.List(args), ttl]), [], [], body).set_lineno(lineno)
+
+    # ttl defaults so bytecode compiled before it existed still renders.
+    def _render(self, args, ttl=None, caller=None):
+        built_with = versions.current(SCOPES)
+        key = (*args, date.today(), built_with)
+
+        html = fragment_cache.get(key)
+        if html is None:
+            html = caller()
+            # A write committed while rendering; the fragment may be stale.
+            if versions.current(SCOPES) == built_with:
+                fragment_cache.set(key, html, ttl)
+        return Markup(html)
+
+
+# Runs the query on first use, so a cached fragment skips it entirely.
+class Deferred:
+    def __init__(self, load):
+        self._load = load
+        self._rows = None
+
+    def _get(self):
+        if self._rows is None:
+            self._rows = self._load()
+        return self._rows
+
+    def __iter__(self):
+        return iter(self._get())
+
+    def __len__(self):
+        return len(self._get())
+
+
+def deferred(load):
+    return Deferred(load)
+
+
+app.jinja_env.add_extension(FragmentCacheExtension)
+
+# Compiled templates are shared through the filesystem, so a fresh worker
+# loads bytecode instead of parsing and compiling every template again.
+if app.config["JINJA_BYTECODE_CACHE_DIR"]:
+    os.makedirs(app.config["JINJA_BYTECODE_CACHE_DIR"], exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config["JINJA_BYTECODE_CACHE_DIR"])
@@ -0,0 +1,71 @@
+from app import app
+from models import Subject, Chapter, Quiz, Questions
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import selectinload, joinedload
+import threading
+
+
+# Eager loading profiles for the list views, keyed by endpoint name.
+# Each profile covers every relationship the view's template walks.
+load_profiles = {
+    "admin": [selectinload(Subject.chapters)],
+    "add_quiz": [joinedload(Chapter.subject)],
+    "quiz": [joinedload(Quiz.chapter), selectinload(Quiz.questions)],
+    "search_subjects": [selectinload(Subject.chapters)],
+    "search_quizzes": [joinedload(Quiz.chapter)],
+    "search_questions": [joinedload(Questions.quiz).joinedload(Quiz.chapter)],
+    "search_user_subjects": [selectinload(Subject.chapters).selectinload(Chapter.quizzes)],
+    "search_user_quizzes": [joinedload(Quiz.chapter), selectinload(Quiz.scores)],
+}
+
+
+def load_profile(name):
+    return load_profiles[name]
+
+
+# Query counting, the one counter for the app. Only hooked up when TESTING
+# or INSTRUMENTATION is on: tests assert the per-page bound with it, and
+# metrics.py reports it per request.
+_local = threading.local()
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    _local.count = getattr(_local, "count", 0) + 1
+
+
+def query_count():
+    return getattr(_local, "count", 0)
+
+
+# with QueryCounter() as counter: ...; counter.count is the queries run inside.
+class QueryCounter:
+    def __enter__(self):
+        self.start = query_count()
+        self.count = 0
+        return self
+
+    def __exit__(self, *exc):
+        self.count = query_count() - self.start
+
+
+def start_query_count():
+    g.query_start = query_count()
+
+
+def check_query_count(response):
+    count = query_count() - g.get("query_start", query_count())
+    response.headers["X-Query-Count"] = str(count)
+
+    limit = app.config.get("MAX_QUERIES_PER_PAGE")
+    if limit and count > limit:
+        app.logger.warning("%s ran %d queries (limit %d)", request.path, count, limit)
+
+    return response
+
+
+if app.config["TESTING"] or app.config["INSTRUMENTATION"]:
+    event.listen(Engine, "before_cursor_execute", _count_query)
+    app.before_request(start_query_count)
+    app.after_request(check_query_count)
@@ -0,0 +1,150 @@
+from app import app
+from flask import g, request, template_rendered, before_render_template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from loaders import query_count
+from collections import deque
+import threading
+import time
+
+
+SAMPLES = 1000
+PERCENTILES = (50, 95, 99)
+FIELDS = ("wall_ms", "sql_count", "sql_ms", "render_ms")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = max(int(round(pct / 100 * len(ordered))) - 1, 0)
+    return ordered[index]
+
+
+# Rolling per-endpoint samples; percentiles are computed over the last SAMPLES requests.
+class Metrics:
+    def __init__(self, samples):
+        self.samples = samples
+        self._endpoints = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, sample):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = {"count": 0, "samples": {field: deque(maxlen=self.samples) for field in FIELDS}}
+                self._endpoints[endpoint] = stats
+            stats["count"] += 1
+            for field in FIELDS:
+                stats["samples"][field].append(sample[field])
+
+    # Values read at snapshot time, e.g. queue depths.
+    def register_gauge(self, name, func):
+        self._gauges[name] = func
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = {
+                endpoint: {
+                    "count": stats["count"],
+                    **{
+                        field: {f"p{pct}": round(percentile(values, pct), 2) for pct in PERCENTILES}
+                        for field, values in stats["samples"].items()
+                    },
+                }
+                for endpoint, stats in sorted(self._endpoints.items())
+            }
+        gauges = {name: func() for name, func in sorted(self._gauges.items())}
+        return {"endpoints": endpoints, "gauges": gauges}
+
+    def prometheus(self):
+        snapshot = self.snapshot()
+        lines = []
+
+        lines.append("# TYPE quizapp_requests_total counter")
+        for endpoint, stats in snapshot["endpoints"].items():
+            lines.append(f'quizapp_requests_total{{endpoint="{endpoint}"}} {stats["count"]}')
+
+        for field in FIELDS:
+            lines.append(f"# TYPE quizapp_{field} summary")
+            for endpoint, stats in snapshot["endpoints"].items():
+                for pct in PERCENTILES:
+                    quantile = pct / 100
+                    lines.append(f'quizapp_{field}{{endpoint="{endpoint}",quantile="{quantile}"}} {stats[field][f"p{pct}"]}')
+
+        for name, value in snapshot["gauges"].items():
+            lines.append(f"# TYPE quizapp_{name} gauge")
+            lines.append(f"quizapp_{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics(SAMPLES)
+
+
+# Per-thread totals for the request in progress.
+_local = threading.local()
+
+
+def _reset():
+    _local.sql_time = 0.0
+    _local.render_time = 0.0
+
+
+def _on_before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _on_after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    _local.sql_time = getattr(_local, "sql_time", 0.0) + elapsed
+
+
+def _on_before_render(sender, template, context, **extra):
+    _local.render_start = time.perf_counter()
+
+
+def _on_rendered(sender, template, context, **extra):
+    start = getattr(_local, "render_start", None)
+    if start is not None:
+        _local.render_time = getattr(_local, "render_time", 0.0) + time.perf_counter() - start
+        _local.render_start = None
+
+
+def _start_request():
+    _reset()
+    g.request_start = time.perf_counter()
+    g.request_queries = query_count()
+
+
+def _finish_request(response):
+    if "request_start" not in g:
+        return response
+
+    sample = {
+        "wall_ms": (time.perf_counter() - g.request_start) * 1000,
+        "sql_count": query_count() - g.request_queries,
+        "sql_ms": _local.sql_time * 1000,
+        "render_ms": _local.render_time * 1000,
+    }
+    endpoint = request.endpoint or "unknown"
+    metrics.record(endpoint, sample)
+
+    threshold = app.config["SLOW_REQUEST_MS"]
+    if threshold and sample["wall_ms"] > threshold:
+        app.logger.warning(
+            "Slow request %s %s: %.1f ms, %d queries (%.1f ms), render %.1f ms",
+            request.method, request.path, sample["wall_ms"], sample["sql_count"], sample["sql_ms"], sample["render_ms"],
+        )
+
+    return response
+
+
+# Opt-in: nothing is hooked up unless INSTRUMENTATION is on. Queries are
+# counted by loaders.py, which turns its counter on for INSTRUMENTATION too.
+if app.config["INSTRUMENTATION"]:
+    event.listen(Engine, "before_cursor_execute", _on_before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _on_after_cursor_execute)
+    before_render_template.connect(_on_before_render, app)
+    template_rendered.connect(_on_rendered, app)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
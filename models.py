@@ -1,5 +1,7 @@
 from app import app
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from replica import RoutingSession, init_replica
 from datetime import datetime
 from enum import Enum
 from werkzeug.security import generate_password_hash
@@ -7,7 +9,22 @@ import os
 from dotenv import load_dotenv
 load_dotenv()
 
-db = SQLAlchemy(app)
+db = SQLAlchemy(app, session_options={"class_": RoutingSession})
+
+# Run on every new SQLite connection; the values come from the SQLITE_* settings in config.py.
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={app.config['SQLITE_JOURNAL_MODE']}")
+    cursor.execute(f"PRAGMA synchronous={app.config['SQLITE_SYNCHRONOUS']}")
+    cursor.execute(f"PRAGMA busy_timeout={int(app.config['SQLITE_BUSY_TIMEOUT'])}")
+    cursor.execute(f"PRAGMA mmap_size={int(app.config['SQLITE_MMAP_SIZE'])}")
+    cursor.execute(f"PRAGMA cache_size={int(app.config['SQLITE_CACHE_SIZE'])}")
+    cursor.close()
+
+with app.app_context():
+    if db.engine.dialect.name == "sqlite":
+        event.listen(db.engine, "connect", set_sqlite_pragmas)
+    init_replica(db.engine)
 
 class QualificationType(Enum):
     HIGH_SCHOOL = "High School"
@@ -38,24 +55,37 @@ class Chapter(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String, nullable=False)
     description = db.Column(db.Text, nullable=False, default="No description available.")
-    subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False)
+    subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False, index=True)
 
     subject = db.relationship('Subject', back_populates='chapters')
     quizzes = db.relationship('Quiz', back_populates='chapter', cascade='all, delete-orphan')
+    score_summary = db.relationship('ChapterScoreSummary', cascade='all, delete-orphan')
+    user_score_summaries = db.relationship('UserChapterScoreSummary', cascade='all, delete-orphan')
 
 class Quiz(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    chapter_id = db.Column(db.Integer, db.ForeignKey('chapter.id'), nullable=False)
-    date_of_quiz = db.Column(db.Date, nullable=False)
+    chapter_id = db.Column(db.Integer, db.ForeignKey('chapter.id'), nullable=False, index=True)
+    date_of_quiz = db.Column(db.Date, nullable=False, index=True)
     duration = db.Column(db.Integer, nullable=False)
+    # Kept in step with the questions by quiz_totals.py
+    question_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    total_marks = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Each attempt gets a random sample of this many questions; 0 means all of them in order.
+    questions_per_attempt = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     chapter = db.relationship('Chapter', back_populates='quizzes')
     questions = db.relationship('Questions', back_populates='quiz', cascade='all, delete-orphan')
     scores = db.relationship('Score', back_populates='quiz', cascade='all, delete-orphan')
 
+    @property
+    def attempt_question_count(self):
+        if self.questions_per_attempt:
+            return min(self.questions_per_attempt, self.question_count)
+        return self.question_count
+
 class Questions(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False, index=True)
     ques_title = db.Column(db.String, nullable=False)
     ques_statement = db.Column(db.String, nullable=False)
     option_a = db.Column(db.String, nullable=False)
@@ -68,18 +98,107 @@ class Questions(db.Model):
     quiz = db.relationship('Quiz', back_populates='questions')
 
 class Score(db.Model):
+    # (user_id, quiz_id) also serves lookups on user_id alone.
+    __table_args__ = (
+        db.Index('ix_score_user_id_quiz_id', 'user_id', 'quiz_id'),
+        db.Index('ix_score_journal_key', 'journal_key', unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False, index=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     time_taken = db.Column(db.Integer, nullable=False)
-    total_score = db.Column(db.Integer, nullable=False)
+    total_score = db.Column(db.Integer, nullable=False, index=True)
     date = db.Column(db.Date, nullable=False)
+    # Set for rows written by the score queue, so a replayed batch is skipped.
+    journal_key = db.Column(db.String)
 
     user = db.relationship('User', back_populates='scores')
     quiz = db.relationship('Quiz', back_populates='scores')
 
-with app.app_context():
+# Score aggregates maintained by aggregates.py
+class ChapterScoreSummary(db.Model):
+    chapter_id = db.Column(db.Integer, db.ForeignKey('chapter.id'), primary_key=True)
+    max_score = db.Column(db.Integer, nullable=False)
+    min_score = db.Column(db.Integer, nullable=False)
+    total_score = db.Column(db.Integer, nullable=False)
+    attempts = db.Column(db.Integer, nullable=False)
+
+    @property
+    def avg_score(self):
+        return self.total_score / self.attempts
+
+class UserChapterScoreSummary(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    chapter_id = db.Column(db.Integer, db.ForeignKey('chapter.id'), primary_key=True)
+    max_score = db.Column(db.Integer, nullable=False)
+    min_score = db.Column(db.Integer, nullable=False)
+    total_score = db.Column(db.Integer, nullable=False)
+    attempts = db.Column(db.Integer, nullable=False)
+
+    @property
+    def avg_score(self):
+        return self.total_score / self.attempts
+
+# create_all skips tables that already exist, so add any missing indexes to them.
+def create_missing_indexes():
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+# create_all doesn't alter existing tables either. SQLite can only add a
+# NOT NULL column that has a server_default to a table with rows.
+def add_missing_columns():
+    inspector = db.inspect(db.engine)
+    added = []
+
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(db.engine.dialect)
+                definition = f'"{column.name}" {column_type}'
+
+                if not column.nullable:
+                    if column.server_default is None:
+                        raise RuntimeError(f"Can't add NOT NULL column {table.name}.{column.name} without a server_default")
+                    definition += " NOT NULL"
+
+                if column.server_default is not None:
+                    default = column.server_default.arg
+                    # Quoted the way CREATE TABLE renders a plain string server_default.
+                    if isinstance(default, str):
+                        default = "'" + default.replace("'", "''") + "'"
+                    else:
+                        default = default.compile(dialect=db.engine.dialect)
+                    definition += f" DEFAULT {default}"
+
+                db.session.execute(db.text(f'ALTER TABLE "{table.name}" ADD COLUMN {definition}'))
+                added.append((table.name, column.name))
+
+    db.session.commit()
+    return added
+
+def backfill_quiz_totals():
+    question_count = db.select(db.func.count(Questions.id)).where(Questions.quiz_id == Quiz.id).scalar_subquery()
+    total_marks = db.select(db.func.coalesce(db.func.sum(Questions.marks), 0)).where(Questions.quiz_id == Quiz.id).scalar_subquery()
+
+    db.session.execute(db.update(Quiz).values(question_count=question_count, total_marks=total_marks))
+    db.session.commit()
+
+# Creates or migrates the schema and the admin account. Runs once per
+# deployment via `flask init-db` (see bootstrap.py) rather than on import.
+def init_db():
+    added_columns = add_missing_columns()
     db.create_all()
+    create_missing_indexes()
+
+    if ("quiz", "question_count") in added_columns:
+        backfill_quiz_totals()
 
     admin = User.query.filter_by(is_admin=True).first()
 
@@ -0,0 +1,98 @@
+from app import app
+from models import db, User
+from flask import g, session
+from collections import OrderedDict, namedtuple
+import os
+import sqlite3
+import threading
+import time
+
+
+Principal = namedtuple("Principal", ["user_id", "is_admin", "is_active", "version"])
+
+
+# Per-user version numbers in a small SQLite file that every worker on the
+# host shares. Bumping one makes every worker reload that user's principal
+# on their next request.
+class PrincipalVersions:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    # Run once by bootstrap.py.
+    def create_table(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS principal_version (user_id INTEGER PRIMARY KEY, version INTEGER NOT NULL)")
+
+    def get(self, user_id):
+        row = self._connect().execute("SELECT version FROM principal_version WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, user_id):
+        self._connect().execute(
+            "INSERT INTO principal_version (user_id, version) VALUES (?, 1) "
+            "ON CONFLICT (user_id) DO UPDATE SET version = version + 1",
+            (user_id,),
+        )
+
+
+# Small LRU of principals with a TTL, so auth checks skip the User lookup.
+# Every get() checks the user's shared version, so invalidate() on any
+# worker takes effect on all of them at once.
+class PrincipalCache:
+    def __init__(self, versions, ttl, maxsize):
+        self.versions = versions
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._principals = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        version = self.versions.get(user_id)
+
+        with self._lock:
+            entry = self._principals.get(user_id)
+            if entry and entry[0] > time.time() and entry[1].version == version:
+                self._principals.move_to_end(user_id)
+                return entry[1]
+
+        user = db.session.query(User.is_admin, User.is_active).filter(User.id == user_id).first()
+        if not user:
+            return None
+
+        # A bump racing with this load leaves a version that the next get() won't match.
+        principal = Principal(user_id, user.is_admin, user.is_active, version)
+
+        with self._lock:
+            self._principals[user_id] = (time.time() + self.ttl, principal)
+            self._principals.move_to_end(user_id)
+            while len(self._principals) > self.maxsize:
+                self._principals.popitem(last=False)
+        return principal
+
+    # Call after the User change has committed.
+    def invalidate(self, user_id):
+        self.versions.bump(user_id)
+        with self._lock:
+            self._principals.pop(user_id, None)
+
+
+principal_versions = PrincipalVersions(app.config["PRINCIPAL_VERSION_PATH"])
+principal_cache = PrincipalCache(principal_versions, app.config["PRINCIPAL_TTL"], app.config["PRINCIPAL_CACHE_SIZE"])
+
+
+# Loaded at most once per request.
+def current_principal():
+    if "principal" not in g:
+        user_id = session.get("user_id")
+        g.principal = principal_cache.get(user_id) if user_id is not None else None
+    return g.principal
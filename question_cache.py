@@ -0,0 +1,111 @@
+from app import app
+from models import db, Chapter, Quiz, Questions
+from collections import namedtuple
+import random
+import threading
+import time
+
+
+# The fields display_question.html needs, plus answer and marks for grading.
+QuestionSnapshot = namedtuple("QuestionSnapshot", ["id", "ques_title", "ques_statement", "option_a", "option_b", "option_c", "option_d", "answer", "marks"])
+# Only the question ids and the answer key ({id: (answer, marks)}) are cached,
+# so a bank of thousands of questions stays small.
+QuizSnapshot = namedtuple("QuizSnapshot", ["id", "chapter_id", "chapter_name", "duration", "questions_per_attempt", "question_ids", "answers"])
+
+
+# Snapshots per quiz. Admin writes invalidate this worker's copy; other
+# workers pick the change up once their copy is ttl seconds old.
+class QuestionCache:
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._quizzes = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, quiz_id):
+        with self._lock:
+            entry = self._quizzes.get(quiz_id)
+            if entry is not None and entry[0] > time.time():
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+
+        snapshot = self._load(quiz_id)
+
+        with self._lock:
+            # Don't store a snapshot that an invalidation raced with.
+            if snapshot is not None and generation == self._generation:
+                self._quizzes[quiz_id] = (time.time() + self.ttl, snapshot)
+        return snapshot
+
+    def invalidate(self, quiz_id):
+        with self._lock:
+            self._quizzes.pop(quiz_id, None)
+            self._generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._quizzes.clear()
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._quizzes)}
+
+    def _load(self, quiz_id):
+        quiz = (
+            db.session.query(Quiz.id, Quiz.chapter_id, Quiz.duration, Quiz.questions_per_attempt, Chapter.name)
+            .join(Chapter, Chapter.id == Quiz.chapter_id)
+            .filter(Quiz.id == quiz_id)
+            .first()
+        )
+
+        if not quiz:
+            return None
+
+        answers = {
+            id: (answer, marks)
+            for id, answer, marks in db.session.query(Questions.id, Questions.answer, Questions.marks).filter_by(quiz_id=quiz_id).order_by(Questions.id)
+        }
+
+        return QuizSnapshot(quiz.id, quiz.chapter_id, quiz.name, quiz.duration, quiz.questions_per_attempt, tuple(answers), answers)
+
+
+question_cache = QuestionCache(app.config["QUESTION_CACHE_TTL"])
+
+
+# The question ids an attempt will be asked, chosen once when it starts.
+# Seeded with the attempt id, so the same attempt always gets the same plan.
+def plan_questions(quiz, seed):
+    question_ids = list(quiz.question_ids)
+
+    if quiz.questions_per_attempt and quiz.questions_per_attempt < len(question_ids):
+        return random.Random(seed).sample(question_ids, quiz.questions_per_attempt)
+
+    return question_ids
+
+
+# One question by primary key; None if it was deleted after the plan was made.
+def load_question(quiz_id, question_id):
+    row = (
+        db.session.query(
+            Questions.id, Questions.ques_title, Questions.ques_statement,
+            Questions.option_a, Questions.option_b, Questions.option_c, Questions.option_d,
+            Questions.answer, Questions.marks,
+        )
+        .filter(Questions.id == question_id, Questions.quiz_id == quiz_id)
+        .first()
+    )
+    return QuestionSnapshot(*row) if row else None
+
+
+# {question id: (answer, marks)} for the given questions, or the whole quiz,
+# from the snapshot. Questions deleted since the plan was made are left out.
+def answer_key(quiz, question_ids=None):
+    if question_ids is None:
+        return quiz.answers
+
+    return {id: quiz.answers[id] for id in question_ids if id in quiz.answers}
@@ -0,0 +1,73 @@
+from models import db, Questions
+import quiz_totals
+import csv
+import io
+import json
+
+
+QUESTION_FIELDS = ["ques_title", "ques_statement", "option_a", "option_b", "option_c", "option_d", "answer", "marks"]
+ANSWERS = ["option_a", "option_b", "option_c", "option_d"]
+
+
+# Parse a CSV (with a header row) or JSON array of questions into dicts.
+def parse_questions(data, file_format):
+    if file_format == "csv":
+        return list(csv.DictReader(io.StringIO(data)))
+
+    rows = json.loads(data)
+
+    if not isinstance(rows, list):
+        raise ValueError("Expected a JSON array of questions")
+
+    return rows
+
+
+# Validate every row first; returns (rows ready for insert, per-row errors).
+def validate_questions(quiz_id, rows):
+    valid = []
+    errors = []
+
+    for index, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append({"row": index, "errors": ["Row must be an object"]})
+            continue
+
+        row_errors = [f"{field} is required" for field in QUESTION_FIELDS if not str(row.get(field) or "").strip()]
+
+        answer = row.get("answer")
+        if answer and answer not in ANSWERS:
+            row_errors.append("answer must be one of option_a, option_b, option_c, option_d")
+
+        marks = row.get("marks")
+        try:
+            marks = int(marks)
+            if marks < 1:
+                row_errors.append("marks must be a positive number")
+        except (TypeError, ValueError):
+            if marks not in (None, ""):
+                row_errors.append("marks must be a number")
+
+        if row_errors:
+            errors.append({"row": index, "errors": row_errors})
+            continue
+
+        question = {field: str(row[field]).strip() for field in QUESTION_FIELDS}
+        question["marks"] = marks
+        question["quiz_id"] = quiz_id
+        valid.append(question)
+
+    return valid, errors
+
+
+# All-or-nothing: nothing is inserted if any row fails validation.
+def import_questions(quiz_id, rows):
+    questions, errors = validate_questions(quiz_id, rows)
+
+    if errors or not questions:
+        return 0, errors
+
+    db.session.execute(db.insert(Questions), questions)
+    quiz_totals.adjust(quiz_id, len(questions), sum(question["marks"] for question in questions))
+    db.session.commit()
+
+    return len(questions), errors
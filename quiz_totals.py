@@ -0,0 +1,19 @@
+from app import app
+from models import Quiz, backfill_quiz_totals
+import click
+
+
+# Adjust Quiz.question_count and Quiz.total_marks in the caller's transaction.
+# Done as SQL increments so concurrent edits don't overwrite each other.
+def adjust(quiz_id, questions, marks):
+    Quiz.query.filter_by(id=quiz_id).update(
+        {Quiz.question_count: Quiz.question_count + questions, Quiz.total_marks: Quiz.total_marks + marks},
+        synchronize_session=False,
+    )
+
+
+@app.cli.command("backfill-quiz-totals")
+def backfill_quiz_totals_command():
+    """Recount question_count and total_marks for every quiz."""
+    backfill_quiz_totals()
+    click.echo("Quiz totals backfilled.")
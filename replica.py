@@ -0,0 +1,67 @@
+from app import app
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, Insert, Update, Delete
+from sqlalchemy.engine import URL
+from functools import wraps
+from urllib.parse import quote
+
+
+# Engine for read-only views, set up by init_replica(); None sends everything to the primary.
+_engine = None
+
+
+# Session that sends reads from views marked @read_only to the replica engine.
+# Flushes and INSERT/UPDATE/DELETE statements always go to the primary.
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and _engine is not None
+            and not self._flushing
+            and not isinstance(clause, (Insert, Update, Delete))
+            and has_app_context()
+            and g.get("read_only")
+        ):
+            return _engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_only(func):
+    @wraps(func)
+    def inner(*args, **kwargs):
+        g.read_only = True
+        return func(*args, **kwargs)
+
+    return inner
+
+
+def _set_replica_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA query_only=ON")
+    cursor.execute(f"PRAGMA busy_timeout={int(app.config['SQLITE_BUSY_TIMEOUT'])}")
+    cursor.execute(f"PRAGMA mmap_size={int(app.config['SQLITE_MMAP_SIZE'])}")
+    cursor.execute(f"PRAGMA cache_size={int(app.config['SQLITE_CACHE_SIZE'])}")
+    cursor.close()
+
+
+# Uses SQLALCHEMY_REPLICA_URI if set, otherwise a mode=ro connection to the
+# primary SQLite file. A lagging replica can serve slightly stale reports.
+def init_replica(primary):
+    global _engine
+
+    if not app.config["READ_REPLICA"]:
+        return
+
+    uri = app.config["SQLALCHEMY_REPLICA_URI"]
+
+    if not uri:
+        database = primary.url.database
+        if primary.dialect.name != "sqlite" or not database or database == ":memory:":
+            return
+        uri = URL.create("sqlite", database=f"file:{quote(database)}", query={"mode": "ro", "uri": "true"})
+
+    _engine = create_engine(uri, **app.config["SQLALCHEMY_ENGINE_OPTIONS"])
+
+    if _engine.dialect.name == "sqlite":
+        event.listen(_engine, "connect", _set_replica_pragmas)
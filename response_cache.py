@@ -0,0 +1,74 @@
+from app import app
+from flask import request, Response
+from collections import OrderedDict
+from functools import wraps
+import hashlib
+import threading
+import time
+import versions
+
+
+# Cache of read-only API responses keyed by endpoint and args. Entries are
+# dropped when a committed write bumps the version of one of their scopes
+# (see versions.py).
+class ResponseCache:
+    def __init__(self, ttl, maxsize):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, scopes):
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+            built_with, expires_at, body, etag = entry
+            if built_with != versions.current(scopes) or expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return body, etag
+
+    def set(self, key, scopes, built_with, body, etag):
+        with self._lock:
+            # A write committed while the response was built; don't cache it.
+            if built_with != versions.current(scopes):
+                return
+            self._entries[key] = (built_with, time.time() + self.ttl, body, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+response_cache = ResponseCache(app.config["RESPONSE_CACHE_TTL"], app.config["RESPONSE_CACHE_SIZE"])
+
+
+def cached(*scopes):
+    def decorator(func):
+        @wraps(func)
+        def inner(*args, **kwargs):
+            key = (request.endpoint, request.path, tuple(sorted(request.args.items(multi=True))))
+            hit = response_cache.get(key, scopes)
+
+            if hit:
+                body, etag = hit
+            else:
+                built_with = versions.current(scopes)
+                response = app.make_response(func(*args, **kwargs))
+
+                if response.status_code != 200:
+                    return response
+
+                body = response.get_data()
+                etag = hashlib.sha1(body).hexdigest()
+                response_cache.set(key, scopes, built_with, body, etag)
+
+            response = Response(body, mimetype="application/json")
+            response.set_etag(etag)
+            return response.make_conditional(request)
+
+        return inner
+
+    return decorator
+
@@ -1,36 +1,59 @@
 from app import app
-from flask import render_template, redirect, flash, request, url_for, session
-from models import db, User, QualificationType, Subject, Chapter, Quiz, Questions, Score
+from flask import render_template, redirect, flash, request, url_for, session, jsonify
+from models import db, User, QualificationType, Subject, Chapter, Quiz, Questions, Score, ChapterScoreSummary, UserChapterScoreSummary
+from loaders import load_profile
+from question_cache import question_cache, plan_questions, load_question
+from attempt_store import make_attempt_store
+import aggregates
+import bulk
+import question_import
+import quiz_totals
+import score_history
+from metrics import metrics
+from principal import current_principal, principal_cache
+from score_queue import score_writer
+from replica import read_only
+from fragment_cache import deferred
+from attempt_sweeper import make_attempt_sweeper, new_attempt, deadline, is_late, score_row
+import search_index
+from timeline import timeline, PER_PAGE
 from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
 from datetime import datetime
+import hmac
 import time
 
 
+attempt_store = make_attempt_store(app.config)
+attempt_sweeper = make_attempt_sweeper(attempt_store, app.config)
+
+
 # Decorators for auth and admin
 def auth_required(func):
     @wraps(func)
     def inner(*args, **kwargs):
         # Checking if user in session, else log in to access index.
-        if "user_id" in session:
-            return func(*args, **kwargs)
-        else:
+        if "user_id" not in session:
             flash("Please log in to continue")
             return redirect(url_for("login"))
 
+        principal = current_principal()
+
+        # Blocked or deleted users are logged out on their next request.
+        if not principal or not principal.is_active:
+            session.pop("user_id")
+            flash("Your account is Blocked!" if principal else "Please log in to continue")
+            return redirect(url_for("login"))
+        return func(*args, **kwargs)
+
     return inner
 
 
 def admin_required(func):
     @wraps(func)
+    @auth_required
     def inner(*args, **kwargs):
-        if "user_id" not in session:
-            flash("Please log in to continue")
-            return redirect(url_for("login"))
-
-        user = User.query.get(session["user_id"])
-
-        if not user.is_admin:
+        if not current_principal().is_admin:
             flash("You are not authorized to access this page")
             return redirect(url_for("index"))
         return func(*args, **kwargs)
@@ -42,9 +65,7 @@ def admin_required(func):
 @app.route("/")
 @auth_required
 def index():
-    user = User.query.get(session["user_id"])
-
-    if user.is_admin:
+    if current_principal().is_admin:
         return redirect(url_for("admin"))
     
     return render_template("index.html")
@@ -142,7 +163,7 @@ def logout():
 @app.route("/admin")
 @admin_required
 def admin():
-    subjects = Subject.query.all()
+    subjects = deferred(lambda: Subject.query.options(*load_profile("admin")).all())
     return render_template("admin/dashboard.html", subjects=subjects)
 
 
@@ -241,6 +262,7 @@ def delete_subject_post(id):
 
     db.session.delete(subject)
     db.session.commit()
+    question_cache.clear()
     flash("Subject deleted successfully!")
     return redirect(url_for("admin"))
 
@@ -329,6 +351,7 @@ def update_chapter_post(id):
     chapter.description = description
 
     db.session.commit()
+    question_cache.clear()
     flash("Chapter updated successfully!")
     return redirect(url_for("admin"))
 
@@ -356,6 +379,7 @@ def delete_chapter_post(id):
 
     db.session.delete(chapter)
     db.session.commit()
+    question_cache.clear()
     flash("Chapter deleted successfully!")
     return redirect(url_for("admin"))
 
@@ -364,7 +388,7 @@ def delete_chapter_post(id):
 @app.route("/admin/quiz")
 @admin_required
 def quiz():
-    quizzes = Quiz.query.all()
+    quizzes = deferred(lambda: Quiz.query.options(*load_profile("quiz")).all())
 
     return render_template("quiz/quiz.html", quizzes=quizzes)
 
@@ -372,7 +396,7 @@ def quiz():
 @app.route("/quiz/add")
 @admin_required
 def add_quiz():
-    chapters = Chapter.query.all()
+    chapters = Chapter.query.options(*load_profile("add_quiz")).all()
 
     return render_template("quiz/add.html", chapters=chapters)
 
@@ -383,14 +407,19 @@ def add_quiz_post():
     chapter_id = request.form.get("chapter_id")
     date_html_format = request.form.get("date")
     duration = request.form.get("duration")
+    questions_per_attempt, error = bulk.questions_per_attempt_value(request.form.get("questions_per_attempt") or 0)
 
     if not chapter_id or not date_html_format or not duration:
         flash("Please fill all the fields!")
         return redirect(url_for("add_quiz"))
+
+    if error:
+        flash(error)
+        return redirect(url_for("add_quiz"))
     
     date = datetime.strptime(date_html_format, "%Y-%m-%d").date()
 
-    quiz = Quiz(chapter_id=chapter_id, date_of_quiz=date, duration=duration)
+    quiz = Quiz(chapter_id=chapter_id, date_of_quiz=date, duration=duration, questions_per_attempt=questions_per_attempt)
 
     db.session.add(quiz)
     db.session.commit()
@@ -430,17 +459,24 @@ def update_quiz_post(id):
     
     date_html_format = request.form.get("date")
     duration = request.form.get("duration")
+    questions_per_attempt, error = bulk.questions_per_attempt_value(request.form.get("questions_per_attempt") or 0)
 
     if not date_html_format or not duration:
         flash("Please fill all the fields!")
         return redirect(url_for("update_quiz", id=id))
+
+    if error:
+        flash(error)
+        return redirect(url_for("update_quiz", id=id))
     
     date = datetime.strptime(date_html_format, "%Y-%m-%d").date()
 
     quiz.date_of_quiz = date
     quiz.duration = duration
+    quiz.questions_per_attempt = questions_per_attempt
 
     db.session.commit()
+    question_cache.invalidate(id)
     flash("Quiz updated successfully!")
     return redirect(url_for("quiz"))
 
@@ -467,7 +503,10 @@ def delete_quiz_post(id):
         return redirect(url_for("quiz"))
     
     db.session.delete(quiz)
+    db.session.flush()
+    aggregates.refresh_chapter(quiz.chapter_id)
     db.session.commit()
+    question_cache.invalidate(id)
     flash("Quiz deleted successfully!")
     return redirect(url_for("quiz"))
 
@@ -507,16 +546,78 @@ def add_question_post(quiz_id):
     if not ques_title or not ques_statement or not marks or not option_a or not option_b or not option_c or not option_d or not answer:
         flash("Please fill all the fields!")
         return redirect(url_for("add_question", quiz_id=quiz_id))
+
+    try:
+        marks = int(marks)
+    except ValueError:
+        marks = 0
+
+    if marks < 1:
+        flash("Marks must be a positive number!")
+        return redirect(url_for("add_question", quiz_id=quiz_id))
     
     ques = Questions(quiz_id=quiz_id, ques_title=ques_title, ques_statement=ques_statement, option_a=option_a, option_b=option_b, option_c=option_c, option_d=option_d, answer=answer, marks=marks)
 
     db.session.add(ques)
+    quiz_totals.adjust(quiz_id, 1, marks)
     db.session.commit()
+    question_cache.invalidate(quiz_id)
 
     flash("New question added successfully!")
     return redirect(url_for("add_question", quiz_id=quiz_id))
 
 
+@app.route("/quiz/<int:quiz_id>/question/import")
+@admin_required
+def import_questions(quiz_id):
+    quiz = Quiz.query.get(quiz_id)
+
+    if not quiz:
+        flash("Quiz does not exist!")
+        return redirect(url_for("quiz"))
+    
+    return render_template("question/import.html", quiz=quiz)
+
+
+@app.route("/quiz/<int:quiz_id>/question/import", methods=["POST"])
+@admin_required
+def import_questions_post(quiz_id):
+    quiz = Quiz.query.get(quiz_id)
+
+    if not quiz:
+        flash("Quiz does not exist!")
+        return redirect(url_for("quiz"))
+    
+    file = request.files.get("questions_file")
+
+    if not file or not file.filename:
+        flash("Please choose a file to import!")
+        return redirect(url_for("import_questions", quiz_id=quiz_id))
+    
+    file_format = "json" if file.filename.lower().endswith(".json") else "csv"
+
+    try:
+        rows = question_import.parse_questions(file.read().decode("utf-8-sig"), file_format)
+    except ValueError:
+        flash("Could not read the file, please upload a valid CSV or JSON file!")
+        return redirect(url_for("import_questions", quiz_id=quiz_id))
+    
+    count, errors = question_import.import_questions(quiz_id, rows)
+
+    if errors:
+        flash("No questions were imported, please fix the errors below!")
+        return render_template("question/import.html", quiz=quiz, errors=errors)
+    
+    if not count:
+        flash("The file has no questions to import!")
+        return redirect(url_for("import_questions", quiz_id=quiz_id))
+    
+    question_cache.invalidate(quiz_id)
+
+    flash(f"{count} questions imported successfully!")
+    return redirect(url_for("quiz"))
+
+
 @app.route("/quiz/question/<int:id>/update")
 @admin_required
 def update_question(id):
@@ -550,9 +651,20 @@ def update_question_post(id):
     if not ques_title or not ques_statement or not marks or not option_a or not option_b or not option_c or not option_d or not answer:
         flash("Please fill all the fields!")
         return redirect(url_for("update_question", id=id))
+
+    try:
+        marks = int(marks)
+    except ValueError:
+        marks = 0
+
+    if marks < 1:
+        flash("Marks must be a positive number!")
+        return redirect(url_for("update_question", id=id))
     
     # return (f"{ques_title},{ques_statement},{marks},{option_a},{option_b},{option_c},{option_d},{answer}")
 
+    quiz_totals.adjust(question.quiz_id, 0, marks - question.marks)
+
     question.ques_title = ques_title
     question.ques_statement = ques_statement
     question.option_a = option_a
@@ -563,6 +675,7 @@ def update_question_post(id):
     question.marks = marks
 
     db.session.commit()
+    question_cache.invalidate(question.quiz_id)
 
     flash("Question updated successfully!")
     return redirect(url_for("quiz"))
@@ -589,8 +702,12 @@ def delete_question_post(id):
         flash("Question does not exist!")
         return redirect(url_for("quiz"))
     
+    quiz_id = question.quiz_id
+
     db.session.delete(question)
+    quiz_totals.adjust(quiz_id, -1, -question.marks)
     db.session.commit()
+    question_cache.invalidate(quiz_id)
 
     flash("Question deleted successfully!")
     return redirect(url_for("quiz"))
@@ -598,15 +715,15 @@ def delete_question_post(id):
 
 # Summary 
 @app.route("/admin/summary")
+@read_only
 @admin_required
 def admin_summary():
     chapter_scores = (
         db.session.query(
             Chapter.name,
-            db.func.max(Score.total_score).label("max_score")
+            db.func.max(ChapterScoreSummary.max_score).label("max_score")
         )
-        .join(Quiz, Quiz.chapter_id == Chapter.id)
-        .join(Score, Score.quiz_id == Quiz.id)
+        .join(ChapterScoreSummary, ChapterScoreSummary.chapter_id == Chapter.id)
         .group_by(Chapter.name)
         .all()
     )
@@ -620,19 +737,19 @@ def admin_summary():
 @app.route("/upcoming-quiz")
 @auth_required
 def upcoming_quiz():
-    date_now = datetime.today().strftime("%Y-%m-%d")
-    quizzes = Quiz.query.filter(Quiz.date_of_quiz >= date_now).all()
+    page = request.args.get("page", 1, type=int)
+    upcoming = deferred(lambda: timeline.upcoming(page))
 
-    return render_template("upcoming_quiz.html", quizzes=quizzes)
+    return render_template("upcoming_quiz.html", upcoming=upcoming, page=page, start=(max(page, 1) - 1) * PER_PAGE)
 
 
 @app.route("/history")
 @auth_required
 def history():
-    date_now = datetime.today().strftime("%Y-%m-%d")
-    quizzes = Quiz.query.filter(Quiz.date_of_quiz < date_now).all()
+    page = request.args.get("page", 1, type=int)
+    buckets, has_next = timeline.history(page)
 
-    return render_template("history.html", quizzes=quizzes)
+    return render_template("history.html", buckets=buckets, page=page, has_next=has_next, start=(max(page, 1) - 1) * PER_PAGE)
 
 
 @app.route("/upcoming-quiz/<int:id>")
@@ -650,101 +767,130 @@ def view_upcoming_quiz(id):
 @app.route("/quiz-start/<int:id>", methods=["GET"])
 @auth_required
 def quiz_start(id):
-    quiz = Quiz.query.get(id)
+    quiz = question_cache.get(id)
+
+    if not quiz:
+        flash("Quiz does not exist!")
+        return redirect(url_for("upcoming_quiz"))
 
-    if "quiz_progress" not in session or session.get("quiz_id") != id:
-        session["quiz_progress"] = 0
-        session["score"] = 0
-        session["quiz_id"] = id
-        session["start_time"] = int(time.time())
-        session["time_taken"] = 0
+    attempts = session.get("attempts", {})
+    attempt_id = attempts.get(str(id))
+    attempt = attempt_store.get(attempt_id) if attempt_id else None
 
-    elapsed_time = int(time.time()) - session["start_time"]
-    remaining_time = max(quiz.duration * 60 - elapsed_time, 0)
+    if not attempt:
+        attempt_id, attempt = new_attempt(quiz, session["user_id"])
+        attempt_store.set(attempt_id, attempt)
+        session["attempts"] = {**attempts, str(id): attempt_id}
+    elif "plan" not in attempt:
+        # Started before attempts carried a question plan.
+        attempt["plan"] = plan_questions(quiz, attempt_id)
+        attempt_store.set(attempt_id, attempt)
+
+    remaining_time = int(deadline(attempt, quiz) - time.time())
     remaining_minutes = remaining_time//60
     remaining_seconds = remaining_time%60
 
-    progress = session["quiz_progress"]
+    plan = attempt["plan"]
+    progress = attempt["progress"]
+
+    if progress >= len(plan) or remaining_time <= 0:
+        return redirect(url_for("result", attempt_id=attempt_id))
 
-    if progress >= len(quiz.questions):
-        return redirect(url_for("result"))
+    current_question = load_question(id, plan[progress])
 
-    current_question = quiz.questions[progress]
+    # Deleted since the attempt started; move on to the next one.
+    if not current_question:
+        attempt["progress"] += 1
+        attempt_store.set(attempt_id, attempt)
+        return redirect(url_for("quiz_start", id=id))
 
-    no_of_ques = len(quiz.questions)
+    no_of_ques = len(plan)
 
-    return render_template("display_question.html", ques=current_question, mins=remaining_minutes, secs=remaining_seconds, no_of_ques=no_of_ques)
+    return render_template("display_question.html", ques=current_question, chapter_name=quiz.chapter_name, progress=progress, mins=remaining_minutes, secs=remaining_seconds, no_of_ques=no_of_ques)
 
 
 @app.route("/quiz-start/<int:id>", methods=["POST"])
 @auth_required
 def quiz_start_post(id):
-    quiz = Quiz.query.get(id)
-    progress = session["quiz_progress"]
+    quiz = question_cache.get(id)
+    attempt_id = session.get("attempts", {}).get(str(id))
+    attempt = attempt_store.get(attempt_id) if attempt_id else None
+
+    if not quiz or not attempt or "plan" not in attempt:
+        return redirect(url_for("quiz_start", id=id))
+
+    now = int(time.time())
+
+    # Checked before any question is loaded, so late posts cost no queries.
+    if is_late(attempt, quiz, now):
+        flash("Time is up! Answers sent after the deadline are not counted.")
+        return redirect(url_for("result", attempt_id=attempt_id))
+
+    plan = attempt["plan"]
+    progress = attempt["progress"]
+
+    if progress >= len(plan):
+        return redirect(url_for("result", attempt_id=attempt_id))
+
+    current_question = load_question(id, plan[progress])
 
     if "submit_quiz" in request.form:
-        time_left = request.form.get("remaining_time")
-        current_question = quiz.questions[progress]
         ans = request.form.get("answer")
 
-        time_taken = quiz.duration * 60 - int(time_left)
+        attempt["finished_at"] = now
         
-        session["time_taken"] = time_taken
+        if current_question and ans == current_question.answer:
+            attempt["score"] += current_question.marks
         
-        if ans == current_question.answer:
-            session["score"] += current_question.marks
-        
-        return redirect(url_for("result"))
+        attempt_store.set(attempt_id, attempt)
+        return redirect(url_for("result", attempt_id=attempt_id))
 
-    current_question = quiz.questions[progress]
     ans = request.form.get("answer")
 
-    if ans == current_question.answer:
-        session["score"] += current_question.marks
+    if current_question and ans == current_question.answer:
+        attempt["score"] += current_question.marks
 
-    session["quiz_progress"] += 1
+    attempt["progress"] += 1
+    attempt_store.set(attempt_id, attempt)
 
     return redirect(url_for("quiz_start", id=id))
 
 
-@app.route("/result")
+@app.route("/result/<attempt_id>")
 @auth_required
-def result():
-    quiz_id = session["quiz_id"]
-    quiz = Quiz.query.get(quiz_id)
+def result(attempt_id):
+    attempt = attempt_store.get(attempt_id)
 
-    user_id = session["user_id"]
-    total_time_taken = session["time_taken"]
-
-    #if quiz time up then total time taken equals to quiz duration
-    if total_time_taken == 0:
-        total_time_taken = quiz.duration * 60
+    if not attempt or attempt["user_id"] != session["user_id"]:
+        flash("Quiz attempt does not exist!")
+        return redirect(url_for("index"))
 
-    mins, secs = divmod(total_time_taken, 60)
-    formatted_time = f"{mins} minutes {secs:02d} seconds"
+    attempts = session.get("attempts", {})
+    session["attempts"] = {key: value for key, value in attempts.items() if value != attempt_id}
 
-    final_score = session["score"]
+    quiz = question_cache.get(attempt["quiz_id"])
+    # Popping claims the attempt; if the sweeper got there first it has already been scored.
+    attempt = attempt_store.pop(attempt_id)
 
-    date = datetime.today().strftime('%Y-%m-%d')
+    if not quiz or not attempt:
+        flash("This quiz attempt has already ended and been recorded.")
+        return redirect(url_for("scores"))
 
-    date_quiz_attempted = datetime.strptime(date, "%Y-%m-%d").date()
+    row = score_row(attempt, quiz, time.time())
+    score_writer.add(*row)
 
-    score = Score(quiz_id=quiz_id, user_id=user_id, time_taken=total_time_taken, total_score=final_score, date=date_quiz_attempted)
+    total_time_taken = row[3]
+    final_score = row[4]
 
-    db.session.add(score)
-    db.session.commit()
-
-    session.pop("quiz_progress")
-    session.pop("score")
-    session.pop("quiz_id")
-    session.pop("start_time")
-    session.pop("time_taken")
+    mins, secs = divmod(total_time_taken, 60)
+    formatted_time = f"{mins} minutes {secs:02d} seconds"
 
     return render_template("result.html", final_score=final_score, total_time_taken=formatted_time)
 
 
 # Search Functionality
 @app.route("/admin/search")
+@read_only
 @admin_required
 def search():
     parameter = request.args.get("parameter")
@@ -756,19 +902,29 @@ def search():
     if not query:
         return render_template("admin/search.html", query=query, parameter=None)
     elif parameter == "uname":
-        users = User.query.filter(User.username.ilike(f'%{query}%')).all()
+        ids = search_index.search("user", query)
+        users = search_index.ranked(User.query, User, ids)
         return render_template("admin/search.html", parameter=parameter, users=users)
     elif parameter == "sname":
-        subjects = Subject.query.filter(Subject.name.ilike(f'%{query}%')).all()
+        ids = search_index.search("subject", query)
+        subjects = search_index.ranked(Subject.query.options(*load_profile("search_subjects")), Subject, ids)
         return render_template("admin/search.html", parameter=parameter, subjects=subjects)
     elif parameter == "qname":
-        quizzes = Quiz.query.join(Chapter).filter(Chapter.name.ilike(f'%{query}%')).all()
+        chapter_ids = search_index.search("chapter", query)
+        rank = {id: index for index, id in enumerate(chapter_ids)}
+        quizzes = Quiz.query.options(*load_profile("search_quizzes")).filter(Quiz.chapter_id.in_(chapter_ids)).all()
+        quizzes.sort(key=lambda quiz: rank[quiz.chapter_id])
         return render_template("admin/search.html", parameter=parameter, quizzes=quizzes)
+    elif parameter == "ques":
+        ids = search_index.search("question", query)
+        questions = search_index.ranked(Questions.query.options(*load_profile("search_questions")), Questions, ids)
+        return render_template("admin/search.html", parameter=parameter, questions=questions)
     
     return render_template("admin/search.html", parameter=parameter, query=query)
 
 
 @app.route("/search")
+@read_only
 @auth_required
 def search_user():
     parameter = request.args.get("parameter")
@@ -782,7 +938,7 @@ def search_user():
     elif parameter == "sname":
         try:
             quiz_date = datetime.strptime(query, "%Y-%m-%d").date()
-            subjects = (Subject.query.join(Chapter).join(Quiz).filter(Quiz.date_of_quiz == quiz_date).all())
+            subjects = (Subject.query.options(*load_profile("search_user_subjects")).join(Chapter).join(Quiz).filter(Quiz.date_of_quiz == quiz_date).all())
         except ValueError:
             flash("Invalid date format. Use YYYY-MM-DD")
             subjects = []
@@ -791,7 +947,7 @@ def search_user():
         try:
             score = int(query)
             print(score)
-            quizzes = (Quiz.query.join(Score).filter(Score.total_score == score).all())
+            quizzes = (Quiz.query.options(*load_profile("search_user_quizzes")).join(Score).filter(Score.total_score == score).all())
         except ValueError:
             flash("Invalid score. Please enter a number")
             quizzes = []
@@ -800,14 +956,18 @@ def search_user():
 
 # Score Page
 @app.route("/scores")
+@read_only
 @auth_required
 def scores():
-    scores = Score.query.filter_by(user_id=(session["user_id"]))
-    return render_template("scores.html", scores=scores)
+    page = request.args.get("page", 1, type=int)
+    scores, has_next = score_history.score_page(session["user_id"], page)
+    rollups = score_history.subject_rollups(session["user_id"])
+    return render_template("scores.html", scores=scores, rollups=rollups, page=page, has_next=has_next)
 
 
 # Summary for user
 @app.route("/summary")
+@read_only
 @auth_required
 def summary_user():
     user_id = session["user_id"]
@@ -815,19 +975,52 @@ def summary_user():
     chapter_score = (
             db.session.query(
         Chapter.name,
-        db.func.max(Score.total_score).label("max_score")
+        db.func.max(UserChapterScoreSummary.max_score).label("max_score")
     )
-    .join(Quiz, Quiz.chapter_id == Chapter.id)
-    .join(Score, Score.quiz_id == Quiz.id)
-    .filter(Score.user_id == user_id)
+    .join(UserChapterScoreSummary, UserChapterScoreSummary.chapter_id == Chapter.id)
+    .filter(UserChapterScoreSummary.user_id == user_id)
     .group_by(Chapter.name)
     .all()
     )
 
     chapters = [chapter.name for chapter in chapter_score]
     scores = [score.max_score for score in chapter_score]
+    rollups = score_history.subject_rollups(user_id)
+
+    return render_template("summary_user.html", chapters=chapters, scores=scores, rollups=rollups)
+
+
+# Question cache stats for Admin
+@app.route("/admin/cache")
+@admin_required
+def cache_stats():
+    return jsonify(question_cache.stats())
+
+
+# Request metrics for Admin
+@app.route("/admin/metrics")
+@admin_required
+def admin_metrics():
+    return render_template("admin/metrics.html", snapshot=metrics.snapshot(), enabled=app.config["INSTRUMENTATION"])
+
+
+# Admins, or scrapers sending "Authorization: Bearer <METRICS_TOKEN>"
+@app.route("/admin/metrics/data")
+def metrics_data():
+    token = app.config["METRICS_TOKEN"]
+
+    authorization = request.headers.get("Authorization", "").encode()
+
+    if not (token and hmac.compare_digest(authorization, f"Bearer {token}".encode())):
+        principal = current_principal() if "user_id" in session else None
+
+        if not principal or not principal.is_admin:
+            return jsonify({"message": "You are not authorized to access this page"}), 403
+
+    if request.args.get("format") == "prometheus":
+        return app.response_class(metrics.prometheus(), mimetype="text/plain")
 
-    return render_template("summary_user.html", chapters=chapters, scores=scores)
+    return jsonify(metrics.snapshot())
 
 
 # Users Page for Admin
@@ -852,6 +1045,7 @@ def access(id):
     user.is_active = not user.is_active
     
     db.session.commit()
+    principal_cache.invalidate(id)
 
     flash(f"{user.username} has been {'unblocked' if user.is_active else 'blocked'} successfully!", "success")
 
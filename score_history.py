@@ -0,0 +1,80 @@
+from models import db, Subject, Chapter, Quiz, Score
+from collections import OrderedDict, namedtuple
+import threading
+import versions
+
+
+ScoreRow = namedtuple("ScoreRow", ["id", "subject_name", "chapter_name", "time_taken", "date", "total_score", "total_marks"])
+SubjectRollup = namedtuple("SubjectRollup", ["subject_name", "attempts", "best_score", "avg_score", "avg_time"])
+
+PER_PAGE = 50
+ROLLUP_CACHE_SIZE = 1024
+
+
+# One page of a user's scores, most recent first, with names joined in: (rows, has_next)
+def score_page(user_id, page=1):
+    page = max(page, 1)
+    rows = (
+        db.session.query(Score.id, Subject.name, Chapter.name, Score.time_taken, Score.date, Score.total_score, Quiz.total_marks)
+        .join(Quiz, Quiz.id == Score.quiz_id)
+        .join(Chapter, Chapter.id == Quiz.chapter_id)
+        .join(Subject, Subject.id == Chapter.subject_id)
+        .filter(Score.user_id == user_id)
+        .order_by(Score.id.desc())
+        .offset((page - 1) * PER_PAGE)
+        .limit(PER_PAGE + 1)
+        .all()
+    )
+    return [ScoreRow(*row) for row in rows[:PER_PAGE]], len(rows) > PER_PAGE
+
+
+# Per-subject rollups per user. An entry is reused while the user's score
+# count and latest score id (an index-only lookup) and the catalogue version
+# are unchanged.
+class RollupCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._rollups = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        count, latest = db.session.query(db.func.count(Score.id), db.func.max(Score.id)).filter(Score.user_id == user_id).one()
+        key = (count, latest, versions.current(("catalogue",)))
+
+        with self._lock:
+            entry = self._rollups.get(user_id)
+            if entry and entry[0] == key:
+                self._rollups.move_to_end(user_id)
+                return entry[1]
+
+        rows = (
+            db.session.query(
+                Subject.name,
+                db.func.count(Score.id),
+                db.func.max(Score.total_score),
+                db.func.avg(Score.total_score),
+                db.func.avg(Score.time_taken),
+            )
+            .join(Quiz, Quiz.id == Score.quiz_id)
+            .join(Chapter, Chapter.id == Quiz.chapter_id)
+            .join(Subject, Subject.id == Chapter.subject_id)
+            .filter(Score.user_id == user_id)
+            .group_by(Subject.id)
+            .order_by(Subject.name)
+            .all()
+        )
+        rollups = [SubjectRollup(*row) for row in rows]
+
+        with self._lock:
+            self._rollups[user_id] = (key, rollups)
+            self._rollups.move_to_end(user_id)
+            while len(self._rollups) > self.maxsize:
+                self._rollups.popitem(last=False)
+        return rollups
+
+
+rollup_cache = RollupCache(ROLLUP_CACHE_SIZE)
+
+
+def subject_rollups(user_id):
+    return rollup_cache.get(user_id)
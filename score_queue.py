@@ -0,0 +1,244 @@
+from app import app
+from models import db, Score
+from metrics import metrics
+from background import BackgroundThread
+from sqlalchemy.exc import OperationalError
+from datetime import date
+import aggregates
+import atexit
+import os
+import secrets
+import sqlite3
+import threading
+
+
+# Writes a finished attempt's Score row and aggregates in the request, as before.
+class SyncScoreWriter:
+    def add(self, quiz_id, chapter_id, user_id, time_taken, total_score, date_attempted):
+        db.session.add(Score(quiz_id=quiz_id, user_id=user_id, time_taken=time_taken, total_score=total_score, date=date_attempted))
+        aggregates.record_score(chapter_id, user_id, total_score)
+        db.session.commit()
+
+    # rows: (quiz_id, chapter_id, user_id, time_taken, total_score, date_attempted), committed together.
+    def add_many(self, rows):
+        db.session.execute(db.insert(Score), [
+            {"quiz_id": quiz_id, "user_id": user_id, "time_taken": time_taken, "total_score": total_score, "date": date_attempted}
+            for quiz_id, chapter_id, user_id, time_taken, total_score, date_attempted in rows
+        ])
+        for quiz_id, chapter_id, user_id, time_taken, total_score, date_attempted in rows:
+            aggregates.record_score(chapter_id, user_id, total_score)
+        db.session.commit()
+
+    def create_tables(self):
+        pass
+
+    def depth(self):
+        return 0
+
+    def flush(self):
+        pass
+
+
+# Write-behind queue for Score rows. add() only appends to a local SQLite
+# journal; a background thread moves journalled rows into the main database
+# in batches of batch_size, or every flush_ms, whichever comes first.
+#
+# The journal is drained under its own write lock, so several workers can
+# share one journal file. A row is removed from the journal only after its
+# batch has committed to the main database. Each row carries a random key
+# that is stored on its Score row, so a batch replayed after a crash
+# between the two commits skips the rows already written.
+#
+# A row that fails on its own for any reason other than the database
+# being locked or unavailable is retried up to max_attempts times, then
+# moved to the failed_score table so it stops blocking the queue.
+class ScoreQueue:
+    def __init__(self, path, batch_size, flush_ms, max_attempts):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_ms = flush_ms
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = BackgroundThread("score-queue", self._run, setup=self._stop.clear)
+        # Rows in the journal: recounted by each flush, bumped by each add.
+        self._depth = 0
+        self._depth_lock = threading.Lock()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # The journal is the only copy of a queued score, so fsync every append.
+            conn.execute("PRAGMA synchronous=FULL")
+            self._local.conn = conn
+        return conn
+
+    # Run once by bootstrap.py, along with the main schema.
+    def create_tables(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = self._connect()
+        for table, extra in (("pending_score", "attempts INTEGER NOT NULL DEFAULT 0"), ("failed_score", "error TEXT NOT NULL")):
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT NOT NULL, quiz_id INTEGER NOT NULL, chapter_id INTEGER NOT NULL, "
+                f"user_id INTEGER NOT NULL, time_taken INTEGER NOT NULL, total_score INTEGER NOT NULL, date TEXT NOT NULL, {extra})"
+            )
+
+        # Journals written before rows had keys and attempt counts.
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(pending_score)")}
+        if "key" not in columns:
+            conn.execute("ALTER TABLE pending_score ADD COLUMN key TEXT")
+            conn.execute("UPDATE pending_score SET key = lower(hex(randomblob(16)))")
+        if "attempts" not in columns:
+            conn.execute("ALTER TABLE pending_score ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+
+    def add(self, quiz_id, chapter_id, user_id, time_taken, total_score, date_attempted):
+        self.add_many([(quiz_id, chapter_id, user_id, time_taken, total_score, date_attempted)])
+
+    def add_many(self, rows):
+        self.start()
+        conn = self._connect()
+        # One journal transaction (and fsync) for the whole list.
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT INTO pending_score (key, quiz_id, chapter_id, user_id, time_taken, total_score, date) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(secrets.token_hex(16), *row[:5], row[5].isoformat()) for row in rows],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        with self._depth_lock:
+            self._depth += len(rows)
+            if self._depth >= self.batch_size:
+                self._wake.set()
+
+    def depth(self):
+        with self._depth_lock:
+            return self._depth
+
+    def start(self):
+        self._thread.start()
+
+    # Only a process that started the queue drains it on exit; CLI commands don't.
+    def stop(self):
+        if not self._thread.started():
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_ms / 1000)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                app.logger.exception("Flushing queued scores failed; retrying on the next tick")
+
+    # Drain the journal into the main database, one batch per transaction.
+    def flush(self):
+        while self._flush_batch():
+            pass
+
+    def _flush_batch(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT id, key, quiz_id, chapter_id, user_id, time_taken, total_score, date, attempts FROM pending_score ORDER BY id LIMIT ?",
+                (self.batch_size,),
+            ).fetchall()
+
+            if rows:
+                try:
+                    self._write(rows)
+                    done = rows
+                except OperationalError:
+                    raise
+                except Exception:
+                    # Find the rows that fail on their own and write the rest.
+                    done = []
+                    for row in rows:
+                        try:
+                            self._write([row])
+                            done.append(row)
+                        except OperationalError:
+                            raise
+                        except Exception as error:
+                            self._failed(conn, row, error)
+
+                conn.executemany("DELETE FROM pending_score WHERE id = ?", [(row[0],) for row in done])
+
+            depth = conn.execute("SELECT count(*) FROM pending_score").fetchone()[0]
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        with self._depth_lock:
+            self._depth = depth
+
+        return len(rows) == self.batch_size
+
+    # Inserts the rows not already in Score, with their aggregates, in one transaction.
+    def _write(self, rows):
+        with app.app_context():
+            try:
+                keys = [row[1] for row in rows]
+                written = set(db.session.scalars(db.select(Score.journal_key).where(Score.journal_key.in_(keys))))
+                rows = [row for row in rows if row[1] not in written]
+
+                if rows:
+                    db.session.execute(db.insert(Score), [
+                        {"journal_key": key, "quiz_id": quiz_id, "user_id": user_id, "time_taken": time_taken, "total_score": total_score, "date": date.fromisoformat(day)}
+                        for id, key, quiz_id, chapter_id, user_id, time_taken, total_score, day, attempts in rows
+                    ])
+                    for id, key, quiz_id, chapter_id, user_id, time_taken, total_score, day, attempts in rows:
+                        aggregates.record_score(chapter_id, user_id, total_score)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+    def _failed(self, conn, row, error):
+        id, key, quiz_id, chapter_id, user_id, time_taken, total_score, day, attempts = row
+
+        if attempts + 1 < self.max_attempts:
+            app.logger.warning("Queued score %s failed (attempt %d of %d): %s", key, attempts + 1, self.max_attempts, error)
+            conn.execute("UPDATE pending_score SET attempts = attempts + 1 WHERE id = ?", (id,))
+            return
+
+        app.logger.error("Queued score %s failed %d times, moving it to failed_score: %s", key, self.max_attempts, error)
+        conn.execute(
+            "INSERT INTO failed_score (key, quiz_id, chapter_id, user_id, time_taken, total_score, date, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, quiz_id, chapter_id, user_id, time_taken, total_score, day, str(error)),
+        )
+        conn.execute("DELETE FROM pending_score WHERE id = ?", (id,))
+
+
+def make_score_writer(config):
+    if config["SCORE_WRITER"] == "queue":
+        queue = ScoreQueue(config["SCORE_QUEUE_PATH"], config["SCORE_BATCH_SIZE"], config["SCORE_FLUSH_MS"], config["SCORE_MAX_ATTEMPTS"])
+        atexit.register(queue.stop)
+        return queue
+
+    return SyncScoreWriter()
+
+
+score_writer = make_score_writer(app.config)
+metrics.register_gauge("score_queue_depth", score_writer.depth)
+
+
+# Replays anything left in the journal by a previous run without waiting for a new result.
+@app.before_request
+def _start_score_writer():
+    if isinstance(score_writer, ScoreQueue):
+        score_writer.start()
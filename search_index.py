@@ -0,0 +1,92 @@
+from app import app
+from models import db
+import click
+import re
+
+
+# One FTS5 table per searchable model, keyed by the model's id as rowid so
+# the sync triggers update and delete by rowid.
+SEARCH_TABLES = {
+    "user": ("user_search", '"user"', ["username"]),
+    "subject": ("subject_search", "subject", ["name"]),
+    "chapter": ("chapter_search", "chapter", ["name"]),
+    "question": ("question_search", "questions", ["ques_title", "ques_statement"]),
+}
+
+
+def _ddl(search_table, source, columns):
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    updates = ", ".join(f"{column} = new.{column}" for column in columns)
+
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {search_table} USING fts5({column_list}, prefix='2 3', tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {search_table}_insert AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {search_table} (rowid, {column_list}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {search_table}_update AFTER UPDATE OF {column_list} ON {source} BEGIN "
+        f"UPDATE {search_table} SET {updates} WHERE rowid = old.id; END",
+        f"CREATE TRIGGER IF NOT EXISTS {search_table}_delete AFTER DELETE ON {source} BEGIN "
+        f"DELETE FROM {search_table} WHERE rowid = old.id; END",
+    ]
+
+
+def _fill(search_table, source, columns):
+    column_list = ", ".join(columns)
+    db.session.execute(db.text(f"DELETE FROM {search_table}"))
+    db.session.execute(db.text(f"INSERT INTO {search_table} (rowid, {column_list}) SELECT id, {column_list} FROM {source}"))
+
+
+# Idempotent: creates missing search tables and triggers, filling new tables from existing rows.
+def create_search_index():
+    existing = set(db.session.scalars(db.text("SELECT name FROM sqlite_master WHERE type = 'table'")))
+
+    for search_table, source, columns in SEARCH_TABLES.values():
+        for statement in _ddl(search_table, source, columns):
+            db.session.execute(db.text(statement))
+        if search_table not in existing:
+            _fill(search_table, source, columns)
+
+    db.session.commit()
+
+
+def rebuild_search_index():
+    for search_table, source, columns in SEARCH_TABLES.values():
+        _fill(search_table, source, columns)
+    db.session.commit()
+
+
+# Turns free text into an FTS5 query matching every word as a prefix.
+def match_query(text):
+    words = re.findall(r"\w+", text or "")
+    return " ".join(f'"{word}"*' for word in words)
+
+
+# Ids of matching rows, best match first.
+def search(kind, text, limit=100):
+    query = match_query(text)
+
+    if not query:
+        return []
+
+    search_table = SEARCH_TABLES[kind][0]
+    rows = db.session.execute(
+        db.text(f"SELECT rowid FROM {search_table} WHERE {search_table} MATCH :query ORDER BY rank LIMIT :limit"),
+        {"query": query, "limit": limit},
+    )
+    return [row[0] for row in rows]
+
+
+# Loads model rows for ranked ids, keeping the rank order.
+def ranked(query, model, ids):
+    if not ids:
+        return []
+
+    position = {id: index for index, id in enumerate(ids)}
+    return sorted(query.filter(model.id.in_(ids)).all(), key=lambda row: position[row.id])
+
+
+@app.cli.command("rebuild-search-index")
+def rebuild_search_index_command():
+    """Rebuild the full-text search tables from the source tables."""
+    rebuild_search_index()
+    click.echo("Search index rebuilt.")
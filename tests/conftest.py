@@ -0,0 +1,96 @@
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+import pytest
+
+
+# The app reads its config from the environment at import time, so point it
+# at a throwaway database before anything imports it.
+_directory = tempfile.mkdtemp()
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(_directory, 'test.sqlite3')}"
+os.environ["PRINCIPAL_VERSION_PATH"] = os.path.join(_directory, "principals.sqlite3")
+os.environ["SCORE_QUEUE_PATH"] = os.path.join(_directory, "scores.journal.sqlite3")
+os.environ["JINJA_BYTECODE_CACHE_DIR"] = os.path.join(_directory, "jinja_cache")
+os.environ.setdefault("TESTING", "true")
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("ADMIN_PASSWORD", "admin")
+os.environ.setdefault("SCORE_WRITER", "sync")
+os.environ.setdefault("ATTEMPT_STORE", "memory")
+os.environ.setdefault("ATTEMPT_SWEEP_INTERVAL", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STUDENT_PASSWORD = "password"
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import app
+    import bootstrap
+
+    bootstrap.bootstrap()
+    return app
+
+
+# A small catalogue: 3 subjects x 3 chapters x 3 quizzes of 5 questions,
+# dated around today, 5 students and a score for each student and quiz.
+@pytest.fixture(scope="session")
+def seeded(app):
+    from models import db, User, Subject, Chapter, Quiz, Questions, Score, backfill_quiz_totals
+    from werkzeug.security import generate_password_hash
+    import aggregates
+
+    with app.app_context():
+        pass_hash = generate_password_hash(STUDENT_PASSWORD)
+        students = [
+            User(username=f"student{i}", password_hash=pass_hash, name=f"Student {i}", qualification="BACHELORS", dob=date(2000, 1, 1))
+            for i in range(5)
+        ]
+        db.session.add_all(students)
+
+        quizzes = []
+        for s in range(3):
+            subject = Subject(name=f"Subject {s}", description="Test")
+            for c in range(3):
+                chapter = Chapter(name=f"Chapter {s}.{c}", description="Test", subject=subject)
+                for q in range(3):
+                    quiz = Quiz(chapter=chapter, date_of_quiz=date.today() + timedelta(days=q - 1), duration=10)
+                    quiz.questions = [
+                        Questions(
+                            ques_title=f"Question {n}", ques_statement=f"Statement {n}",
+                            option_a="A", option_b="B", option_c="C", option_d="D", answer="option_a", marks=2,
+                        )
+                        for n in range(5)
+                    ]
+                    quizzes.append(quiz)
+            db.session.add(subject)
+
+        db.session.flush()
+        db.session.add_all(
+            Score(quiz=quiz, user=student, time_taken=60, total_score=4, date=date.today())
+            for quiz in quizzes for student in students
+        )
+        db.session.commit()
+
+        backfill_quiz_totals()
+        aggregates.rebuild()
+        db.session.commit()
+
+        return {"quiz_ids": [quiz.id for quiz in quizzes], "usernames": [student.username for student in students]}
+
+
+def login(client, username, password):
+    response = client.post("/login", data={"username": username, "password": password})
+    assert response.status_code == 302
+    return client
+
+
+@pytest.fixture
+def admin_client(app, seeded):
+    return login(app.test_client(), "admin", os.environ["ADMIN_PASSWORD"])
+
+
+@pytest.fixture
+def student_client(app, seeded):
+    return login(app.test_client(), seeded["usernames"][0], STUDENT_PASSWORD)
@@ -0,0 +1,28 @@
+import pytest
+
+
+# Admin-only API endpoints: (method, path, JSON body).
+ADMIN_ENDPOINTS = {
+    "question import": ("post", "/api/quiz/1/questions", []),
+    "bulk create": ("post", "/api/subject/bulk", []),
+    "bulk update": ("put", "/api/chapter/bulk", []),
+    "bulk delete": ("delete", "/api/quiz/bulk", []),
+}
+
+
+@pytest.mark.parametrize("name", ADMIN_ENDPOINTS)
+def test_admin_endpoint_rejects_anonymous(app, seeded, name):
+    method, path, body = ADMIN_ENDPOINTS[name]
+
+    response = getattr(app.test_client(), method)(path, json=body)
+
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize("name", ADMIN_ENDPOINTS)
+def test_admin_endpoint_rejects_students(student_client, name):
+    method, path, body = ADMIN_ENDPOINTS[name]
+
+    response = getattr(student_client, method)(path, json=body)
+
+    assert response.status_code == 403
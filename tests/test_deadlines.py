@@ -0,0 +1,109 @@
+import time
+
+
+def start_attempt(client, quiz_id):
+    client.get(f"/quiz-start/{quiz_id}")
+    with client.session_transaction() as session:
+        return session["attempts"][str(quiz_id)]
+
+
+# Moves the attempt back in time so its deadline was `ago` seconds ago.
+def past_deadline(attempt_id, ago):
+    from routes import attempt_store
+
+    attempt = attempt_store.get(attempt_id)
+    shift = attempt["deadline"] - int(time.time()) + ago
+    attempt["start_time"] -= shift
+    attempt["deadline"] -= shift
+    attempt_store.set(attempt_id, attempt)
+
+
+def scores(app, quiz_id):
+    from models import db, User, Score
+
+    with app.app_context():
+        return db.session.scalars(
+            db.select(Score.total_score).join(User).where(Score.quiz_id == quiz_id, User.username == "student0").order_by(Score.id)
+        ).all()
+
+
+def test_answer_within_grace_counts(app, seeded, student_client):
+    # Each test has a quiz to itself, so the Score lists below are exact.
+    quiz_id = seeded["quiz_ids"][-1]
+    attempt_id = start_attempt(student_client, quiz_id)
+    past_deadline(attempt_id, 1)
+    before = scores(app, quiz_id)
+
+    student_client.post(f"/quiz-start/{quiz_id}", data={"answer": "option_a", "submit_quiz": "1"})
+    student_client.get(f"/result/{attempt_id}")
+
+    assert scores(app, quiz_id) == before + [2]
+
+
+def test_answer_after_grace_is_rejected(app, seeded, student_client):
+    from routes import attempt_store
+
+    quiz_id = seeded["quiz_ids"][-2]
+
+    attempt_id = start_attempt(student_client, quiz_id)
+    past_deadline(attempt_id, app.config["ATTEMPT_GRACE_SECONDS"] + 1)
+    before = scores(app, quiz_id)
+
+    response = student_client.post(f"/quiz-start/{quiz_id}", data={"answer": "option_a", "submit_quiz": "1"})
+
+    assert response.headers["Location"] == f"/result/{attempt_id}"
+    assert attempt_store.get(attempt_id)["score"] == 0
+
+    student_client.get(f"/result/{attempt_id}")
+
+    assert scores(app, quiz_id) == before + [0]
+
+
+def test_api_submit_after_deadline_is_rejected(app, seeded, student_client):
+    from routes import attempt_store
+
+    quiz_id = seeded["quiz_ids"][-3]
+
+    attempt_id = student_client.post(f"/api/quiz/{quiz_id}/attempt").json["attempt_id"]
+    past_deadline(attempt_id, app.config["ATTEMPT_GRACE_SECONDS"] + 1)
+
+    response = student_client.post(f"/api/quiz/{quiz_id}/submit", json={"attempt_id": attempt_id, "answers": {}})
+
+    assert response.status_code == 409
+    # Left for the sweeper to record.
+    assert attempt_store.get(attempt_id) is not None
+
+
+# result() reads the attempt, then the sweeper claims it before result()
+# pops it: only the sweeper's Score row is written.
+def test_sweeper_and_result_score_once(app, seeded, student_client, monkeypatch):
+    from routes import attempt_store, attempt_sweeper
+
+    quiz_id = seeded["quiz_ids"][-4]
+    attempt_id = start_attempt(student_client, quiz_id)
+    past_deadline(attempt_id, app.config["ATTEMPT_GRACE_SECONDS"] + 1)
+    before = scores(app, quiz_id)
+
+    pop = attempt_store.pop
+
+    def sweep_then_pop(attempt_id):
+        monkeypatch.setattr(attempt_store, "pop", pop)
+        with app.app_context():
+            attempt_sweeper.sweep()
+        return pop(attempt_id)
+
+    monkeypatch.setattr(attempt_store, "pop", sweep_then_pop)
+    response = student_client.get(f"/result/{attempt_id}", follow_redirects=True)
+
+    assert b"already ended and been recorded" in response.data
+    assert scores(app, quiz_id) == before + [0]
+
+    # And the other way round: a submitted attempt is gone before the sweeper looks.
+    attempt_id = start_attempt(student_client, quiz_id)
+    student_client.get(f"/result/{attempt_id}")
+
+    assert attempt_id not in attempt_store.due(time.time() + 3600, 100)
+    with app.app_context():
+        attempt_sweeper.sweep()
+
+    assert scores(app, quiz_id) == before + [0, 0]
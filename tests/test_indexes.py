@@ -0,0 +1,60 @@
+from datetime import date
+
+import pytest
+
+
+# The hot filters and joins from the views, and the index each should use.
+# Built lazily because the models can only be imported once the app is.
+HOT_QUERIES = {
+    "chapters of a subject": (
+        lambda m: m.db.select(m.Chapter.id).where(m.Chapter.subject_id == 1),
+        "ix_chapter_subject_id",
+    ),
+    "quizzes of a chapter": (
+        lambda m: m.db.select(m.Quiz.id).where(m.Quiz.chapter_id == 1),
+        "ix_quiz_chapter_id",
+    ),
+    "upcoming quizzes": (
+        lambda m: m.db.select(m.Quiz.id).where(m.Quiz.date_of_quiz >= date.today()).order_by(m.Quiz.date_of_quiz),
+        "ix_quiz_date_of_quiz",
+    ),
+    "search_user by quiz date": (
+        lambda m: m.db.select(m.Subject.id).join(m.Chapter).join(m.Quiz).where(m.Quiz.date_of_quiz == date.today()),
+        "ix_quiz_date_of_quiz",
+    ),
+    "questions of a quiz": (
+        lambda m: m.db.select(m.Questions.id).where(m.Questions.quiz_id == 1),
+        "ix_questions_quiz_id",
+    ),
+    "scores of a quiz": (
+        lambda m: m.db.select(m.Score.id).where(m.Score.quiz_id == 1),
+        "ix_score_quiz_id",
+    ),
+    "scores of a user": (
+        lambda m: m.db.select(m.Score.id, m.Score.total_score).where(m.Score.user_id == 1),
+        "ix_score_user_id_quiz_id",
+    ),
+    "search_user by score": (
+        lambda m: m.db.select(m.Quiz.id).join(m.Score).where(m.Score.total_score == 10),
+        "ix_score_total_score",
+    ),
+}
+
+
+def query_plan(statement):
+    from models import db
+
+    sql = str(statement.compile(db.engine, compile_kwargs={"literal_binds": True}))
+    return [row[-1] for row in db.session.execute(db.text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_uses_index(app, name):
+    import models
+
+    build, index = HOT_QUERIES[name]
+
+    with app.app_context():
+        plan = query_plan(build(models))
+
+    assert any(index in step for step in plan), f"{name} does not use {index}: {plan}"
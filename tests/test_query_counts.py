@@ -0,0 +1,57 @@
+import pytest
+
+
+# The list views must stay within MAX_QUERIES_PER_PAGE however many rows
+# they show. Caches are cleared first so each page is rendered cold.
+@pytest.mark.parametrize("client_name, path", [
+    ("admin_client", "/admin"),
+    ("admin_client", "/admin/quiz"),
+    ("student_client", "/upcoming-quiz"),
+    ("student_client", "/scores"),
+])
+def test_page_stays_within_query_bound(app, request, client_name, path):
+    from loaders import QueryCounter
+    from fragment_cache import fragment_cache
+    from question_cache import question_cache
+
+    client = request.getfixturevalue(client_name)
+    fragment_cache.clear()
+    question_cache.clear()
+
+    with QueryCounter() as counter:
+        response = client.get(path)
+
+    assert response.status_code == 200
+    assert counter.count == int(response.headers["X-Query-Count"])
+    assert counter.count <= app.config["MAX_QUERIES_PER_PAGE"], f"{path} ran {counter.count} queries"
+
+
+# Cached fragments defer their queries, so a warm page runs none of them,
+# and a fragment never outlives the data it was built from.
+@pytest.mark.parametrize("client_name, path", [
+    ("admin_client", "/admin"),
+    ("admin_client", "/admin/quiz"),
+    ("student_client", "/upcoming-quiz"),
+])
+def test_cached_fragment_skips_queries(app, request, client_name, path):
+    from fragment_cache import fragment_cache
+
+    client = request.getfixturevalue(client_name)
+    fragment_cache.clear()
+    client.get(path)
+
+    response = client.get(path)
+
+    assert response.status_code == 200
+    assert int(response.headers["X-Query-Count"]) == 0
+
+
+def test_upcoming_fragment_expires_with_the_timeline(app, student_client):
+    import time
+    from fragment_cache import fragment_cache
+
+    fragment_cache.clear()
+    student_client.get("/upcoming-quiz")
+
+    [(expires_at, html)] = fragment_cache._fragments.values()
+    assert expires_at <= time.time() + app.config["TIMELINE_TTL"]
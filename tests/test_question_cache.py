@@ -0,0 +1,34 @@
+from datetime import date
+
+
+QUESTION = {
+    "ques_title": "Title", "ques_statement": "Statement", "option_a": "A", "option_b": "B", "option_c": "C", "option_d": "D",
+    "answer": "option_a", "marks": 2,
+}
+
+
+# Submissions are graded against the answer key cached with the quiz
+# snapshot, so a question edit must drop it.
+def test_answer_key_follows_question_edits(app, admin_client, student_client):
+    from question_cache import question_cache, answer_key
+
+    response = admin_client.post("/api/quiz", json={"chapter_id": 1, "date_of_quiz": date.today().isoformat(), "duration": 10})
+    quiz_id = response.json["id"]
+    admin_client.post(f"/api/quiz/{quiz_id}/questions", json=[QUESTION, QUESTION])
+
+    with app.app_context():
+        quiz = question_cache.get(quiz_id)
+    first, second = quiz.question_ids
+    assert answer_key(quiz) == {first: ("option_a", 2), second: ("option_a", 2)}
+    assert answer_key(quiz, [second]) == {second: ("option_a", 2)}
+
+    admin_client.post(f"/quiz/question/{first}/update", data={**QUESTION, "answer": "option_b", "marks": 3})
+
+    attempt = student_client.post(f"/api/quiz/{quiz_id}/attempt").json
+    response = student_client.post(
+        f"/api/quiz/{quiz_id}/submit",
+        json={"attempt_id": attempt["attempt_id"], "answers": {str(first): "option_b", str(second): "option_a"}},
+    )
+
+    assert response.status_code == 200
+    assert (response.json["total_score"], response.json["correct"]) == (5, 2)
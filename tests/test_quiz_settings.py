@@ -0,0 +1,41 @@
+from datetime import date
+
+
+def quiz_item(chapter_id, **fields):
+    return {"chapter_id": chapter_id, "date_of_quiz": date.today().isoformat(), "duration": 10, **fields}
+
+
+def questions_per_attempt(app, quiz_ids):
+    from models import db, Quiz
+
+    with app.app_context():
+        return dict(db.session.query(Quiz.id, Quiz.questions_per_attempt).filter(Quiz.id.in_(quiz_ids)))
+
+
+def test_bulk_update_keeps_questions_per_attempt_when_omitted(app, admin_client):
+    response = admin_client.post("/api/quiz/bulk", json=[quiz_item(1, questions_per_attempt=3), quiz_item(1, questions_per_attempt=3)])
+    kept, changed = [result["id"] for result in response.json["results"]]
+
+    response = admin_client.put("/api/quiz/bulk", json=[{"id": kept, **quiz_item(1)}, {"id": changed, **quiz_item(1, questions_per_attempt=2)}])
+
+    assert response.status_code == 200
+    assert questions_per_attempt(app, [kept, changed]) == {kept: 3, changed: 2}
+
+
+def test_bulk_rejects_bad_questions_per_attempt(admin_client):
+    response = admin_client.post("/api/quiz/bulk", json=[quiz_item(1, questions_per_attempt=-1), quiz_item(1, questions_per_attempt="x")])
+
+    assert response.status_code == 400
+    assert [result["errors"] for result in response.json["results"]] == [
+        ["questions_per_attempt can't be negative"], ["questions_per_attempt must be a number"],
+    ]
+
+
+def test_quiz_form_flashes_bad_questions_per_attempt(app, admin_client):
+    response = admin_client.post(
+        "/quiz/add", data={"chapter_id": 1, "date": date.today().isoformat(), "duration": 10, "questions_per_attempt": "-1"}, follow_redirects=True,
+    )
+    assert b"questions_per_attempt can&#39;t be negative" in response.data
+
+    response = admin_client.post("/quiz/1/update", data={"date": date.today().isoformat(), "duration": 10, "questions_per_attempt": "x"}, follow_redirects=True)
+    assert b"questions_per_attempt must be a number" in response.data
@@ -0,0 +1,62 @@
+import os
+from datetime import date
+
+import pytest
+
+
+@pytest.fixture
+def queue(app, seeded, tmp_path):
+    from score_queue import ScoreQueue
+
+    queue = ScoreQueue(os.path.join(tmp_path, "journal.sqlite3"), batch_size=10, flush_ms=1000, max_attempts=2)
+    queue.create_tables()
+    # Keep the background thread out of the way; the tests flush by hand.
+    queue.start = lambda: None
+    return queue
+
+
+def totals(app, chapter_id):
+    from models import db, Score, Quiz, ChapterScoreSummary
+
+    with app.app_context():
+        scores = db.session.scalar(db.select(db.func.count(Score.id)).join(Quiz).where(Quiz.chapter_id == chapter_id))
+        summary = db.session.get(ChapterScoreSummary, chapter_id)
+        return scores, (summary.max_score, summary.min_score, summary.total_score, summary.attempts)
+
+
+def test_replayed_batch_is_written_once(app, seeded, queue):
+    from models import db, Quiz
+
+    with app.app_context():
+        quiz = db.session.get(Quiz, seeded["quiz_ids"][0])
+        chapter_id = quiz.chapter_id
+    before = totals(app, chapter_id)
+
+    queue.add_many([(quiz.id, chapter_id, user_id, 30, 6, date.today()) for user_id in (1, 2, 3)])
+    rows = queue._connect().execute(
+        "SELECT id, key, quiz_id, chapter_id, user_id, time_taken, total_score, date, attempts FROM pending_score ORDER BY id"
+    ).fetchall()
+
+    # The batch commits to the main database, then the process dies before
+    # the journal rows are deleted, so the next flush replays it.
+    queue._write(rows)
+    written = totals(app, chapter_id)
+    assert written[0] == before[0] + 3
+    queue.flush()
+
+    assert totals(app, chapter_id) == written
+    assert queue.depth() == 0
+
+
+def test_failing_row_moves_to_failed_score(app, seeded, queue):
+    conn = queue._connect()
+    conn.execute(
+        "INSERT INTO pending_score (key, quiz_id, chapter_id, user_id, time_taken, total_score, date) VALUES ('bad', 1, 1, 1, 30, 6, 'not a date')"
+    )
+
+    queue.flush()
+    assert conn.execute("SELECT attempts FROM pending_score WHERE key = 'bad'").fetchone() == (1,)
+
+    queue.flush()
+    assert conn.execute("SELECT count(*) FROM pending_score").fetchone() == (0,)
+    assert conn.execute("SELECT key FROM failed_score").fetchall() == [("bad",)]
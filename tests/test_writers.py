@@ -0,0 +1,45 @@
+import threading
+from datetime import date
+
+THREADS = 8
+WRITES = 25
+
+
+# Concurrent score commits, the way result() makes them, must wait on
+# each other through busy_timeout rather than fail with "database is locked".
+def test_concurrent_writers_are_not_locked_out(app, seeded):
+    from models import db, User, Quiz, Score
+    from sqlalchemy.exc import OperationalError
+    import aggregates
+
+    quiz_ids = seeded["quiz_ids"]
+
+    with app.app_context():
+        user_ids = db.session.scalars(db.select(User.id).where(User.username.in_(seeded["usernames"]))).all()
+        before = db.session.scalar(db.select(db.func.count(Score.id)))
+
+    errors = []
+
+    def writer(n):
+        with app.app_context():
+            for i in range(WRITES):
+                try:
+                    quiz = db.session.get(Quiz, quiz_ids[(n + i) % len(quiz_ids)])
+                    user_id = user_ids[n % len(user_ids)]
+                    db.session.add(Score(quiz_id=quiz.id, user_id=user_id, time_taken=60, total_score=2, date=date.today()))
+                    aggregates.record_score(quiz.chapter_id, user_id, 2)
+                    db.session.commit()
+                except OperationalError as error:
+                    db.session.rollback()
+                    errors.append(str(error.orig))
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+
+    with app.app_context():
+        assert db.session.scalar(db.select(db.func.count(Score.id))) == before + THREADS * WRITES
@@ -0,0 +1,76 @@
+from app import app
+from models import db, Chapter, Quiz
+from collections import namedtuple
+from datetime import date
+from itertools import groupby
+import threading
+import time
+import versions
+
+
+TimelineQuiz = namedtuple("TimelineQuiz", ["id", "chapter_name", "no_of_ques", "date_of_quiz", "duration"])
+
+PER_PAGE = 50
+
+
+# All quizzes with chapter name and question count from one query, kept
+# until the date rolls over or a quiz or chapter write commits. Writes on
+# other workers don't bump this worker's versions, so the list is also
+# rebuilt once it is ttl seconds old.
+class Timeline:
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._quizzes = None
+        self._built_for = None
+        self._expires_at = 0
+        self._lock = threading.Lock()
+
+    def _current(self):
+        return date.today(), versions.current(("catalogue",))
+
+    def quizzes(self):
+        key = self._current()
+
+        with self._lock:
+            if self._built_for == key and self._expires_at > time.time():
+                return self._quizzes
+
+        rows = (
+            db.session.query(Quiz.id, Chapter.name, Quiz.question_count, Quiz.questions_per_attempt, Quiz.date_of_quiz, Quiz.duration)
+            .join(Chapter, Chapter.id == Quiz.chapter_id)
+            .order_by(Quiz.date_of_quiz, Quiz.id)
+            .all()
+        )
+        quizzes = [
+            TimelineQuiz(id, chapter_name, min(per_attempt, count) if per_attempt else count, date_of_quiz, duration)
+            for id, chapter_name, count, per_attempt, date_of_quiz, duration in rows
+        ]
+
+        with self._lock:
+            # Only keep it if nothing changed while the query ran.
+            if self._current() == key:
+                self._quizzes = quizzes
+                self._built_for = key
+                self._expires_at = time.time() + self.ttl
+        return quizzes
+
+    def upcoming(self, page=1):
+        today = date.today()
+        return paginate([quiz for quiz in self.quizzes() if quiz.date_of_quiz >= today], page)
+
+    # Most recent first.
+    def history(self, page=1):
+        today = date.today()
+        return paginate([quiz for quiz in reversed(self.quizzes()) if quiz.date_of_quiz < today], page)
+
+
+# One page of quizzes grouped by date: ([(date, [quiz, ...]), ...], has_next)
+def paginate(quizzes, page):
+    page = max(page, 1)
+    start = (page - 1) * PER_PAGE
+    rows = quizzes[start:start + PER_PAGE]
+    buckets = [(day, list(group)) for day, group in groupby(rows, key=lambda quiz: quiz.date_of_quiz)]
+    return buckets, len(quizzes) > start + PER_PAGE
+
+
+timeline = Timeline(app.config["TIMELINE_TTL"])
@@ -0,0 +1,60 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+import threading
+
+
+# Which cached data a write to each table can change.
+TABLE_SCOPES = {
+    "subject": {"catalogue"},
+    "chapter": {"catalogue"},
+    "quiz": {"catalogue"},
+    "questions": {"questions"},
+    "score": {"scores"},
+}
+
+_versions = {"catalogue": 0, "questions": 0, "scores": 0}
+_lock = threading.Lock()
+
+
+# Version numbers for the given scopes; they change whenever a committed
+# write touches one of the scope's tables.
+def current(scopes):
+    with _lock:
+        return tuple(_versions[scope] for scope in scopes)
+
+
+def bump(scopes):
+    with _lock:
+        for scope in scopes:
+            _versions[scope] += 1
+
+
+# Collect the tables written in a transaction, bump their scopes on commit.
+def _mark(session, table_name):
+    session.info.setdefault("version_scopes", set()).update(TABLE_SCOPES.get(table_name, ()))
+
+
+@event.listens_for(Session, "before_flush")
+def _track_flush(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        _mark(session, obj.__table__.name)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            _mark(orm_execute_state.session, mapper.local_table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_on_commit(session):
+    scopes = session.info.pop("version_scopes", None)
+    if scopes:
+        bump(scopes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_on_rollback(session):
+    session.info.pop("version_scopes", None)
@@ -0,0 +1,6 @@
+# Production entry point, e.g. `gunicorn -w 4 -b 0.0.0.0:8000 wsgi:app`.
+# Run `flask init-db` once per deployment first; workers don't touch the schema.
+# `python app.py` still initialises the database and starts the development server.
+from app import app
+
+application = app